@@ -0,0 +1,822 @@
+"""
+Benchmarks for the MCP GitHub server, run against the local stand-in API in
+fake_github.py so that results are reproducible and do not use any quota.
+
+Usage:
+    python benchmark.py concurrency --calls 50 --latency 0.05
+    python benchmark.py pagination --repos 2000 --workers 1 8
+    python benchmark.py delete-branches --deletions 100 --tls
+    python benchmark.py batch-branches --repos 15 --branches 40
+    python benchmark.py overview --branches 100 --pulls 30 --limit 100
+    python benchmark.py mirror --commits 20000
+    python benchmark.py git-cycles --cycles 200
+    python benchmark.py git-status --files 100000
+    python benchmark.py merge-queue --pulls 20 --mergeable-delay 2
+    python benchmark.py serialization --commits 10000
+    python benchmark.py shared-server --clients 50 --calls 40
+    python benchmark.py suite --commits 100000 --branches 5000 --output before.json
+    python benchmark.py compare before.json after.json
+"""
+from fake_github import FakeGitHub, create_app
+import argparse
+import asyncio
+from collections import Counter
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def self_signed_certificate():
+    """Write a throwaway certificate for 127.0.0.1 and return (certfile, keyfile)"""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+    import datetime
+    import ipaddress
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]), critical=False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    directory = tempfile.mkdtemp(prefix="fake-github-")
+    certfile = os.path.join(directory, "cert.pem")
+    keyfile = os.path.join(directory, "key.pem")
+    with open(certfile, "wb") as f:
+        f.write(certificate.public_bytes(serialization.Encoding.PEM))
+    with open(keyfile, "wb") as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+    return certfile, keyfile
+
+def reload_server_config():
+    """Make an already imported server.py read the environment again (it reads it once)"""
+    server = sys.modules.get("server")
+    if server is not None:
+        server.github_config = None
+
+def start_fake_github(tls=False, **options):
+    """Start fake_github.py in a background thread and point the server at it"""
+    import uvicorn
+    state = FakeGitHub(**options)
+    port = free_port()
+    ssl_options = {}
+    if tls:
+        certfile, keyfile = self_signed_certificate()
+        ssl_options = {"ssl_certfile": certfile, "ssl_keyfile": keyfile}
+        # httpx and requests both trust these variables
+        os.environ["SSL_CERT_FILE"] = certfile
+        os.environ["REQUESTS_CA_BUNDLE"] = certfile
+    config = uvicorn.Config(create_app(state), host="127.0.0.1", port=port, log_level="warning", **ssl_options)
+    fake_server = uvicorn.Server(config)
+    threading.Thread(target=fake_server.run, daemon=True).start()
+    while not fake_server.started:
+        time.sleep(0.01)
+
+    os.environ["GITHUB_TOKEN"] = "fake-token"
+    os.environ["GITHUB_API_URL"] = f"{'https' if tls else 'http'}://127.0.0.1:{port}"
+    reload_server_config()
+    return state
+
+def summarize(durations):
+    durations = sorted(durations)
+    return {
+        "calls": len(durations),
+        "p50_ms": round(durations[len(durations) // 2] * 1000, 2),
+        "p95_ms": round(durations[min(int(len(durations) * 0.95), len(durations) - 1)] * 1000, 2),
+    }
+
+async def bench_concurrency(args):
+    """
+    N get_repository_info calls issued one after another (what happened when
+    tools were synchronous and blocked the event loop) versus all at once.
+    Each call asks for a different repository so that request coalescing does
+    not fold them into one upstream request; the same N calls for a single
+    repository are reported apart, as "coalesced".
+    """
+    state = start_fake_github(repos=args.calls, branches=0, pulls=0, latency=args.latency)
+    import server
+    repository_names = list(state.repos)
+
+    async def call(repository_full_name):
+        result = await server.get_repository_info(repository_full_name)
+        if "error" in result:
+            raise RuntimeError(result["error"])
+
+    results = {}
+    for mode in ("serial", "concurrent", "coalesced"):
+        server.get_response_cache().clear()
+        state.requests.clear()
+        shared = server.single_flight.shared
+        start = time.perf_counter()
+        if mode == "serial":
+            for repository_full_name in repository_names:
+                await call(repository_full_name)
+        elif mode == "concurrent":
+            await asyncio.gather(*(call(repository_full_name) for repository_full_name in repository_names))
+        else:
+            await asyncio.gather(*(call(repository_names[0]) for _ in range(args.calls)))
+        elapsed = time.perf_counter() - start
+        results[mode] = {
+            "seconds": round(elapsed, 3),
+            "calls_per_second": round(args.calls / elapsed, 1),
+            "api_calls": sum(state.requests.values()),
+            "shared_calls": server.single_flight.shared - shared
+        }
+    results["speedup"] = round(results["serial"]["seconds"] / results["concurrent"]["seconds"], 1)
+    return results
+
+async def bench_pagination(args):
+    """list_repositories over a large account with serial versus parallel page fetching"""
+    state = start_fake_github(repos=args.repos, branches=0, pulls=0, latency=args.latency)
+    import server
+
+    results = {}
+    for workers in args.workers:
+        os.environ["GITHUB_PAGE_WORKERS"] = str(workers)
+        reload_server_config()
+        server.get_response_cache().clear()
+        state.requests.clear()
+        start = time.perf_counter()
+        result = await server.list_repositories()
+        elapsed = time.perf_counter() - start
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        results[f"workers={workers}"] = {
+            "seconds": round(elapsed, 3),
+            "repositories": len(result["result"]),
+            "api_calls": sum(state.requests.values())
+        }
+    return results
+
+async def bench_delete_branches(args):
+    """
+    N sequential branch deletions with a fresh connection per call (what
+    delete_branch did with requests.delete) versus the pooled keep-alive client.
+    """
+    state = start_fake_github(tls=args.tls, repos=1, branches=args.deletions * 2, commits=10, pulls=0, latency=args.latency)
+    # Mide el transporte, no el ritmo de escrituras del scheduler
+    os.environ["GITHUB_WRITE_RATE"] = "1000"
+    os.environ["GITHUB_WRITE_BURST"] = str(args.deletions)
+    import requests
+    import server
+    repository_full_name = next(iter(state.repos))
+    api_url = os.environ["GITHUB_API_URL"]
+    headers = server.api_headers(os.environ["GITHUB_TOKEN"])
+    branches = [name for name in state.repos[repository_full_name]["branches"] if name != "master"]
+
+    async def fresh(branch):
+        url = f"{api_url}/repos/{repository_full_name}/git/refs/heads/{branch}"
+        response = await asyncio.to_thread(requests.delete, url, headers=headers)
+        if response.status_code != 204:
+            raise RuntimeError(response.text)
+
+    async def pooled(branch):
+        result = await server.force_delete_branch(repository_full_name, branch, os.environ["GITHUB_TOKEN"])
+        if "error" in result:
+            raise RuntimeError(result["error"])
+
+    results = {}
+    for mode, delete in (("fresh_connection", fresh), ("pooled", pooled)):
+        durations = []
+        start = time.perf_counter()
+        for _ in range(args.deletions):
+            call_start = time.perf_counter()
+            await delete(branches.pop())
+            durations.append(time.perf_counter() - call_start)
+        elapsed = time.perf_counter() - start
+        results[mode] = {"seconds": round(elapsed, 3), **summarize(durations)}
+    results["speedup"] = round(results["fresh_connection"]["seconds"] / results["pooled"]["seconds"], 1)
+    return results
+
+async def bench_batch_branches(args):
+    """
+    Cut release branches across several repositories with one create_branch
+    call per branch versus a single create_branches call.
+    """
+    os.environ["GITHUB_WRITE_RATE"] = "1000"
+    os.environ["GITHUB_WRITE_BURST"] = str(args.branches * 2)
+    state = start_fake_github(repos=args.repos, branches=0, commits=10, pulls=0, latency=args.latency)
+    import server
+    names = list(state.repos)
+
+    results = {}
+    for mode in ("per_branch", "batch"):
+        # --branches ramas repartidas entre los repositorios
+        items = [
+            {"repository_full_name": names[n % len(names)], "branch_name": f"release-{mode}-{n}", "source_branch": "master"}
+            for n in range(args.branches)
+        ]
+        server.get_response_cache().clear()
+        server.get_repository_cache().clear()
+        state.requests.clear()
+        start = time.perf_counter()
+        if mode == "per_branch":
+            for item in items:
+                result = await server.create_branch(**item)
+                if "error" in result:
+                    raise RuntimeError(result["error"])
+        else:
+            result = await server.create_branches(items)
+            errors = [entry["error"] for entry in result["result"] if "error" in entry]
+            if errors:
+                raise RuntimeError(errors[0])
+        elapsed = time.perf_counter() - start
+        results[mode] = {
+            "seconds": round(elapsed, 3),
+            "tool_calls": len(items) if mode == "per_branch" else 1,
+            "api_calls": sum(state.requests.values())
+        }
+    results["speedup"] = round(results["per_branch"]["seconds"] / results["batch"]["seconds"], 1)
+    return results
+
+async def bench_overview(args):
+    """
+    Repository overview (metadata, branches, open pull requests and recent
+    commits) assembled from four REST tools versus one get_repository_overview.
+    """
+    state = start_fake_github(repos=1, branches=args.branches, pulls=args.pulls, commits=args.commits, latency=args.latency)
+    import server
+    repository_full_name = next(iter(state.repos))
+
+    async def rest():
+        return await asyncio.gather(
+            server.get_repository_info(repository_full_name),
+            server.list_branches(repository_full_name),
+            server.list_pull_requests(repository_full_name),
+            server.list_commits(repository_full_name, limit=args.limit)
+        )
+
+    async def graphql():
+        return [await server.get_repository_overview(repository_full_name, limit=args.limit)]
+
+    results = {}
+    for mode, fetch in (("rest", rest), ("graphql", graphql)):
+        server.get_response_cache().clear()
+        state.requests.clear()
+        state.bytes.clear()
+        start = time.perf_counter()
+        for result in await fetch():
+            if "error" in result:
+                raise RuntimeError(result["error"])
+        elapsed = time.perf_counter() - start
+        results[mode] = {
+            "seconds": round(elapsed, 3),
+            "api_calls": sum(state.requests.values()),
+            "bytes": sum(state.bytes.values())
+        }
+    return results
+
+def make_git_history(path, commits, files=100):
+    """Create a bare repository with a linear history of N commits using git fast-import"""
+    subprocess.run(["git", "init", "-q", "--bare", "-b", "master", path], check=True)
+    stream = []
+    for index in range(commits):
+        content = f"revision {index}\n".encode()
+        message = f"Synthetic commit {index}".encode()
+        stream += [
+            b"commit refs/heads/master",
+            f"author Author {index % 17} <dev{index % 17}@example.com> {1577836800 + index * 60} +0000".encode(),
+            f"committer Author {index % 17} <dev{index % 17}@example.com> {1577836800 + index * 60} +0000".encode(),
+            f"data {len(message)}".encode(), message,
+            f"M 100644 inline src/file{index % files}.txt".encode(),
+            f"data {len(content)}".encode(), content,
+            b""
+        ]
+    subprocess.run(["git", "fast-import", "--quiet"], cwd=path, input=b"\n".join(stream) + b"\n", check=True)
+
+async def bench_mirror(args):
+    """
+    Whole history of a repository through the REST API (one page per 100
+    commits) versus a local mirror, plus a path-filtered query on the mirror.
+    """
+    state = start_fake_github(repos=1, commits=args.commits, branches=0, pulls=0, latency=args.latency)
+    repository_full_name = next(iter(state.repos))
+    root = tempfile.mkdtemp(prefix="mirror-bench-")
+    make_git_history(os.path.join(root, "remotes", f"{repository_full_name}.git"), args.commits)
+    import server
+
+    async def list_all():
+        commits, cursor = 0, None
+        while True:
+            result = await server.list_commits(repository_full_name, limit=args.page_size, cursor=cursor)
+            if "error" in result:
+                raise RuntimeError(result["error"])
+            commits += len(result["result"])
+            cursor = result["next_cursor"]
+            if not cursor:
+                return commits
+
+    results = {}
+    for mode in ("rest", "mirror"):
+        if mode == "mirror":
+            os.environ["GITHUB_MIRROR_DIR"] = os.path.join(root, "mirrors")
+            os.environ["GITHUB_MIRROR_URL"] = f"file://{root}/remotes/{{repository_full_name}}.git"
+            reload_server_config()
+            # El primer acceso crea el mirror; se mide aparte
+            start = time.perf_counter()
+            await server.list_branches(repository_full_name)
+            results["mirror_initial_fetch_seconds"] = round(time.perf_counter() - start, 3)
+        server.get_response_cache().clear()
+        state.requests.clear()
+        start = time.perf_counter()
+        commits = await list_all()
+        elapsed = time.perf_counter() - start
+        results[mode] = {"seconds": round(elapsed, 3), "commits": commits, "api_calls": sum(state.requests.values())}
+
+    start = time.perf_counter()
+    await server.list_commits(repository_full_name, limit=50, path="src/file7.txt", author="Author 3")
+    results["mirror_filtered_query_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return results
+
+async def bench_git_cycles(args):
+    """
+    add/commit cycles on a local repository with a new Repo handle per call
+    (the previous behaviour) versus the handle pool. Both run the same git
+    subprocesses per cycle, so only the cost of opening the handle differs.
+    """
+    import server
+    from git import Repo
+    path = tempfile.mkdtemp(prefix="git-cycles-")
+    Repo.init(path, initial_branch="master")
+    with Repo(path).config_writer() as writer:
+        writer.set_value("user", "name", "Benchmark")
+        writer.set_value("user", "email", "benchmark@example.com")
+
+    def drop_pool():
+        if server.repo_pool is not None:
+            for repo, _ in server.repo_pool._entries.values():
+                repo.close()
+        server.repo_pool = None
+
+    results = {}
+    for mode in ("fresh_handle", "pooled"):
+        drop_pool()
+        durations = []
+        start = time.perf_counter()
+        for cycle in range(args.cycles):
+            call_start = time.perf_counter()
+            with open(os.path.join(path, f"file{cycle % 10}.txt"), "w") as f:
+                f.write(f"{mode} {cycle}\n")
+            for result in (await server.git_add(path), await server.git_commit(f"cycle {cycle}", path)):
+                if "error" in result:
+                    raise RuntimeError(result["error"])
+            if mode == "fresh_handle":
+                drop_pool()
+            durations.append(time.perf_counter() - call_start)
+        elapsed = time.perf_counter() - start
+        results[mode] = {"seconds": round(elapsed, 3), **summarize(durations)}
+    return results
+
+async def best_of(fn, *args, repeat=3, **kwargs):
+    """Best wall time in ms of repeat calls; fn may be a coroutine function"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        if asyncio.iscoroutine(result):
+            result = await result
+        if isinstance(result, dict) and "error" in result:
+            raise RuntimeError(result["error"])
+        timings.append(time.perf_counter() - start)
+    return round(min(timings) * 1000, 1)
+
+async def bench_git_status(args):
+    """
+    Dirty checks, staging and status on a generated large checkout with a few
+    modified files: whole-tree operations versus the pathspec/untracked-cache
+    ones used by the git tools.
+    """
+    import server
+    from git import Repo
+    path = tempfile.mkdtemp(prefix="git-status-")
+    for index in range(args.files):
+        directory = os.path.join(path, f"dir{index % 1000}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"file{index}.txt"), "w") as f:
+            f.write(f"{index}\n")
+    repo = Repo.init(path, initial_branch="master")
+    with repo.config_writer() as writer:
+        writer.set_value("user", "name", "Benchmark")
+        writer.set_value("user", "email", "benchmark@example.com")
+    repo.git.add(A=True)
+    repo.git.commit(m="Initial commit", no_verify=True)
+
+    changed = [f"dir{index % 1000}/file{index}.txt" for index in range(0, args.files, args.files // args.changes)]
+    for name in changed:
+        with open(os.path.join(path, name), "a") as f:
+            f.write("changed\n")
+
+    results = {"files": args.files, "changed": len(changed)}
+    plain = Repo(path)
+    # Lo que hacían git_commit (is_dirty) y git_add (add -A) antes
+    results["is_dirty_untracked_ms"] = await best_of(plain.is_dirty, untracked_files=True)
+    results["status_without_untracked_cache_ms"] = await best_of(
+        lambda: plain.git(c="core.untrackedCache=false").status("--porcelain"))
+    results["git_add_all_ms"] = await best_of(plain.git.add, A=True)
+    plain.git.reset()
+
+    # La primera llamada rellena la caché de untracked en el índice
+    await server.git_status(path)
+    results["git_status_tool_ms"] = await best_of(server.git_status, path)
+    results["git_add_paths_ms"] = await best_of(server.git_add, path, paths=changed)
+    with server.get_repo_pool().open(path) as pooled:
+        results["staged_check_ms"] = await best_of(pooled.git.diff, "--cached", "--quiet", with_exceptions=False)
+    results["git_commit_tool_ms"] = await best_of(server.git_commit, "benchmark", path, repeat=1)
+    return results
+
+async def bench_merge_queue(args):
+    """
+    Merge N pull requests whose mergeability GitHub computes with a delay
+    after every change of their base: an agent retrying a check-once merge
+    every --retry-interval seconds versus one merge_pull_requests call.
+    """
+    os.environ["GITHUB_WRITE_RATE"] = "1000"
+    os.environ["GITHUB_WRITE_BURST"] = str(args.pulls * 2)
+    import server
+    results = {}
+    for mode in ("retry_loop", "merge_queue"):
+        state = start_fake_github(repos=1, pulls=args.pulls, branches=args.pulls, commits=10,
+                                  latency=args.latency, mergeable_delay=args.mergeable_delay)
+        server.get_response_cache().clear()
+        repository_full_name = next(iter(state.repos))
+        numbers = list(range(1, args.pulls + 1))
+        tool_calls = 0
+        start = time.perf_counter()
+        if mode == "retry_loop":
+            # Lo que hacía un agente: comprobar una vez, y si no es mergeable, reintentar
+            for number in numbers:
+                while True:
+                    tool_calls += 1
+                    pull, _ = await server.github_get(f"/repos/{repository_full_name}/pulls/{number}")
+                    if pull["mergeable"]:
+                        url = f"/repos/{repository_full_name}/pulls/{number}/merge"
+                        response = await server.github_request("PUT", url, json_body={"sha": pull["head"]["sha"]})
+                        if response.status_code == 200:
+                            break
+                    await asyncio.sleep(args.retry_interval)
+        else:
+            tool_calls = 1
+            result = await server.merge_pull_requests(repository_full_name, numbers)
+            errors = [entry["error"] for entry in result["result"] if "error" in entry]
+            if errors:
+                raise RuntimeError(errors[0])
+        elapsed = time.perf_counter() - start
+        results[mode] = {
+            "seconds": round(elapsed, 3),
+            "tool_calls": tool_calls,
+            "api_calls": sum(state.requests.values())
+        }
+    return results
+
+async def bench_serialization(args):
+    """
+    Payload size and serialization cost of a list_commits result with every
+    commit, for the default output and for the compact options. The result is
+    serialized the way FastMCP sends it to the client.
+    """
+    from mcp.server.fastmcp.server import _convert_to_content
+    state = start_fake_github(repos=1, commits=args.commits, branches=0, pulls=0, latency=0)
+    repository_full_name = next(iter(state.repos))
+    import server
+
+    variants = {
+        "objects": {},
+        "fields": {"fields": ["sha", "message"]},
+        "truncated": {"message_length": args.message_length},
+        "columns": {"format": "columns"},
+        "fields_truncated_columns": {"fields": ["sha", "message"], "message_length": args.message_length, "format": "columns"}
+    }
+    results = {"commits": args.commits}
+    for name, options in variants.items():
+        result = await server.list_commits(repository_full_name, limit=args.commits, **options)
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        payload = _convert_to_content(result)[0].text
+        results[name] = {
+            "bytes": len(payload.encode()),
+            "serialize_ms": await best_of(_convert_to_content, result, repeat=5),
+            "tool_ms": await best_of(server.list_commits, repository_full_name, limit=args.commits, **options)
+        }
+    return results
+
+async def bench_shared_server(args):
+    """
+    Many MCP clients sharing one server over SSE. Every client declares its
+    own repository as root and checks that git_status sees that repository
+    and nothing outside it.
+    """
+    from mcp import ClientSession, types
+    from mcp.client.sse import sse_client
+    import uvicorn
+    state = start_fake_github(repos=args.repos, commits=200, branches=20, pulls=5, latency=args.latency)
+    repositories = list(state.repos)
+    import server
+    # FastMCP registra cada petición a nivel INFO
+    logging.getLogger("mcp").setLevel(logging.WARNING)
+    port = free_port()
+    server.enable_shared_mode("127.0.0.1", port)
+    shared = uvicorn.Server(uvicorn.Config(server.mcp.sse_app(), host="127.0.0.1", port=port, log_level="warning", access_log=False))
+    threading.Thread(target=shared.run, daemon=True).start()
+    while not shared.started:
+        time.sleep(0.01)
+
+    root = tempfile.mkdtemp(prefix="shared-bench-")
+    durations, errors, violations = [], Counter(), 0
+
+    async def client(index):
+        nonlocal violations
+        workspace = os.path.join(root, f"client-{index}")
+        subprocess.run(["git", "init", "-q", "-b", f"client-{index}", workspace], check=True)
+
+        async def list_roots(context):
+            return types.ListRootsResult(roots=[types.Root(uri=f"file://{workspace}")])
+
+        repository_full_name = repositories[index % len(repositories)]
+        workload = [
+            ("get_repository_info", {"repository_full_name": repository_full_name}),
+            ("list_branches", {"repository_full_name": repository_full_name}),
+            ("list_pull_requests", {"repository_full_name": repository_full_name}),
+            ("git_status", {}),
+        ]
+        async with sse_client(f"http://127.0.0.1:{port}/sse", timeout=30) as (read, write):
+            async with ClientSession(read, write, list_roots_callback=list_roots) as session:
+                await session.initialize()
+                for call in range(args.calls):
+                    name, arguments = workload[call % len(workload)]
+                    start = time.perf_counter()
+                    result = await session.call_tool(name, arguments)
+                    durations.append(time.perf_counter() - start)
+                    payload = json.loads(result.content[0].text)
+                    if "error" in payload:
+                        errors[name] += 1
+                    elif name == "git_status" and payload["result"]["branch"] != f"client-{index}":
+                        violations += 1
+                # Fuera de sus roots no puede abrir ningún repositorio
+                result = await session.call_tool("git_status", {"repo_path": os.path.join(root, f"client-{index + 1}")})
+                if "error" not in json.loads(result.content[0].text):
+                    violations += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(index) for index in range(args.clients)))
+    elapsed = time.perf_counter() - start
+    shared.should_exit = True
+    return {
+        "clients": args.clients,
+        "tool_calls": len(durations),
+        "seconds": round(elapsed, 3),
+        "calls_per_second": round(len(durations) / elapsed, 1),
+        **summarize(durations),
+        "api_calls": sum(state.requests.values()),
+        "errors": dict(errors),
+        "isolation_violations": violations
+    }
+
+# Cargas del escenario suite: etiqueta -> (herramienta, argumentos)
+SUITE_WORKLOADS = {
+    "get_repository_info": ("get_repository_info", {"repository_full_name": "{repository}"}),
+    "list_repositories": ("list_repositories", {}),
+    "list_branches": ("list_branches", {"repository_full_name": "{repository}"}),
+    "list_pull_requests": ("list_pull_requests", {"repository_full_name": "{repository}"}),
+    "list_commits": ("list_commits", {"repository_full_name": "{repository}", "limit": 100}),
+    "list_commits_1000": ("list_commits", {"repository_full_name": "{repository}", "limit": 1000}),
+    "get_repository_overview": ("get_repository_overview", {"repository_full_name": "{repository}", "limit": 100}),
+}
+
+async def bench_suite(args):
+    """
+    End-to-end run of server.py as an MCP client sees it: the server is
+    started over stdio against the fake API and every tool in
+    SUITE_WORKLOADS is driven through ClientSession. For each tool it
+    reports the first (cold) call, p50/p95 latency and throughput of the
+    following calls, and the API calls and bytes the fake API served.
+    """
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+    import httpx
+    state = start_fake_github(repos=args.repos, commits=args.commits, branches=args.branches, pulls=args.pulls,
+                              latency=args.latency, rate_limit=args.rate_limit, max_per_page=args.max_per_page)
+    api_url = os.environ["GITHUB_API_URL"]
+    workdir = tempfile.mkdtemp(prefix="suite-bench-")
+    env_file = os.path.join(workdir, ".env")
+    settings = {
+        "GITHUB_TOKEN": "fake-token",
+        "GITHUB_USERNAME": "octocat",
+        "GITHUB_REPOSITORY": "repo0",
+        "GITHUB_API_URL": api_url,
+        "GITHUB_VERIFY_TOKEN": "off",
+        **dict(setting.split("=", 1) for setting in args.server_env)
+    }
+    with open(env_file, "w") as f:
+        f.writelines(f"{key}={value}\n" for key, value in settings.items())
+    server_log = os.path.join(workdir, "server.log")
+
+    def fake_stats():
+        return httpx.get(f"{api_url}/_stats").json()
+
+    tools = args.tools or list(SUITE_WORKLOADS)
+    results = {"options": {key: value for key, value in vars(args).items() if key not in ("output", "scenario")},
+               "server_log": server_log, "tools": {}}
+    parameters = StdioServerParameters(command=sys.executable, args=[os.path.abspath("server.py"), "--env-file", env_file],
+                                       cwd=workdir)
+    with open(server_log, "w") as errlog:
+        async with stdio_client(parameters, errlog=errlog) as (read, write):
+            async with ClientSession(read, write) as session:
+                start = time.perf_counter()
+                await session.initialize()
+                results["initialize_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+                async def call(label, index):
+                    name, template = SUITE_WORKLOADS[label]
+                    repository = repositories[index % len(repositories)]
+                    arguments = {key: value.format(repository=repository) if isinstance(value, str) else value
+                                 for key, value in template.items()}
+                    start = time.perf_counter()
+                    result = await session.call_tool(name, arguments)
+                    elapsed = time.perf_counter() - start
+                    return elapsed, result.isError or "error" in json.loads(result.content[0].text)
+
+                repositories = list(state.repos)
+                for label in tools:
+                    before = fake_stats()
+                    cold, cold_error = await call(label, 0)
+                    semaphore = asyncio.Semaphore(args.concurrency)
+
+                    async def limited(index):
+                        async with semaphore:
+                            return await call(label, index)
+
+                    start = time.perf_counter()
+                    timings = await asyncio.gather(*(limited(index) for index in range(args.calls)))
+                    elapsed = time.perf_counter() - start
+                    after = fake_stats()
+                    results["tools"][label] = {
+                        "cold_ms": round(cold * 1000, 1),
+                        **summarize([duration for duration, _ in timings]),
+                        "calls_per_second": round(args.calls / elapsed, 1),
+                        "errors": cold_error + sum(error for _, error in timings),
+                        "api_calls": after["total"] - before["total"],
+                        "api_bytes": sum(after["bytes"].values()) - sum(before["bytes"].values())
+                    }
+
+                stats = json.loads((await session.call_tool("server_stats", {})).content[0].text)["result"]
+                results["server"] = {"process": stats["process"], "startup": stats["startup"],
+                                     "response_cache": stats["response_cache"], "coalescing": stats["coalescing"]}
+    return results
+
+def compare(args):
+    """Print the change of every latency, throughput and API call figure between two suite reports"""
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    print(f"{before.get('commit')} -> {after.get('commit')}")
+    for tool, old in before["results"]["tools"].items():
+        new = after["results"]["tools"].get(tool)
+        if new is None:
+            continue
+        changes = []
+        for key in ("cold_ms", "p50_ms", "p95_ms", "calls_per_second", "api_calls", "api_bytes"):
+            change = f"{(new[key] - old[key]) / old[key] * 100:+.0f}%" if old[key] else ""
+            changes.append(f"{key} {old[key]} -> {new[key]} {change}")
+        print(f"{tool}:\n  " + "\n  ".join(changes))
+    old_rss, new_rss = before["results"]["server"]["process"], after["results"]["server"]["process"]
+    if old_rss and new_rss:
+        print(f"peak_rss_mb {old_rss['peak_rss_mb']} -> {new_rss['peak_rss_mb']}")
+
+def git_commit():
+    """Commit of the working tree, with a -dirty suffix if it has uncommitted changes"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+SCENARIOS = {
+    "concurrency": bench_concurrency,
+    "pagination": bench_pagination,
+    "delete-branches": bench_delete_branches,
+    "batch-branches": bench_batch_branches,
+    "overview": bench_overview,
+    "mirror": bench_mirror,
+    "git-cycles": bench_git_cycles,
+    "git-status": bench_git_status,
+    "merge-queue": bench_merge_queue,
+    "serialization": bench_serialization,
+    "shared-server": bench_shared_server,
+    "suite": bench_suite,
+}
+
+def main():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--output", help="Write the results as JSON to this file")
+
+    parser = argparse.ArgumentParser(description="Benchmarks for the MCP GitHub server")
+    subparsers = parser.add_subparsers(dest="scenario", required=True)
+
+    concurrency = subparsers.add_parser("concurrency", parents=[common], help="Concurrent get_repository_info calls")
+    concurrency.add_argument("--calls", type=int, default=50)
+    concurrency.add_argument("--latency", type=float, default=0.05)
+
+    pagination = subparsers.add_parser("pagination", parents=[common], help="list_repositories over many pages")
+    pagination.add_argument("--repos", type=int, default=2000)
+    pagination.add_argument("--latency", type=float, default=0.05)
+    pagination.add_argument("--workers", type=int, nargs="+", default=[1, 8])
+
+    delete_branches = subparsers.add_parser("delete-branches", parents=[common], help="Sequential branch deletions")
+    delete_branches.add_argument("--deletions", type=int, default=100)
+    delete_branches.add_argument("--latency", type=float, default=0.0)
+    delete_branches.add_argument("--tls", action="store_true", help="Serve the fake API over HTTPS with a self-signed certificate")
+
+    batch_branches = subparsers.add_parser("batch-branches", parents=[common], help="create_branch calls versus create_branches")
+    batch_branches.add_argument("--repos", type=int, default=15)
+    batch_branches.add_argument("--branches", type=int, default=40)
+    batch_branches.add_argument("--latency", type=float, default=0.05)
+
+    overview = subparsers.add_parser("overview", parents=[common], help="REST tools versus get_repository_overview")
+    overview.add_argument("--branches", type=int, default=100)
+    overview.add_argument("--pulls", type=int, default=30)
+    overview.add_argument("--commits", type=int, default=1000)
+    overview.add_argument("--limit", type=int, default=100)
+    overview.add_argument("--latency", type=float, default=0.05)
+
+    mirror = subparsers.add_parser("mirror", parents=[common], help="list_commits through the API versus a local mirror")
+    mirror.add_argument("--commits", type=int, default=20000)
+    mirror.add_argument("--page-size", type=int, default=1000)
+    mirror.add_argument("--latency", type=float, default=0.05)
+
+    git_cycles = subparsers.add_parser("git-cycles", parents=[common], help="git_add/git_commit cycles on a local repository")
+    git_cycles.add_argument("--cycles", type=int, default=200)
+
+    git_status = subparsers.add_parser("git-status", parents=[common], help="Status and staging on a large checkout")
+    git_status.add_argument("--files", type=int, default=100000)
+    git_status.add_argument("--changes", type=int, default=10)
+
+    merge_queue = subparsers.add_parser("merge-queue", parents=[common], help="Retried merges versus merge_pull_requests")
+    merge_queue.add_argument("--pulls", type=int, default=20)
+    merge_queue.add_argument("--mergeable-delay", type=float, default=2.0)
+    merge_queue.add_argument("--retry-interval", type=float, default=1.0)
+    merge_queue.add_argument("--latency", type=float, default=0.05)
+
+    serialization = subparsers.add_parser("serialization", parents=[common], help="Payload size of list_commits output options")
+    serialization.add_argument("--commits", type=int, default=10000)
+    serialization.add_argument("--message-length", type=int, default=20)
+
+    shared_server = subparsers.add_parser("shared-server", parents=[common], help="Concurrent MCP clients against one server over SSE")
+    shared_server.add_argument("--clients", type=int, default=50)
+    shared_server.add_argument("--calls", type=int, default=40, help="Tool calls per client")
+    shared_server.add_argument("--repos", type=int, default=10)
+    shared_server.add_argument("--latency", type=float, default=0.05)
+
+    suite = subparsers.add_parser("suite", parents=[common], help="Every read tool through an MCP client session over stdio")
+    suite.add_argument("--repos", type=int, default=3)
+    suite.add_argument("--commits", type=int, default=100000)
+    suite.add_argument("--branches", type=int, default=5000)
+    suite.add_argument("--pulls", type=int, default=50)
+    suite.add_argument("--latency", type=float, default=0.05)
+    suite.add_argument("--rate-limit", type=int, default=5000, help="Requests per hour allowed by the fake API")
+    suite.add_argument("--max-per-page", type=int, default=100, help="Largest page size served by the fake API")
+    suite.add_argument("--calls", type=int, default=20, help="Calls per tool after the first one")
+    suite.add_argument("--concurrency", type=int, default=4, help="Calls per tool in flight at once")
+    suite.add_argument("--tools", nargs="+", choices=list(SUITE_WORKLOADS), help="Tools to run (default: all)")
+    suite.add_argument("--server-env", nargs="*", default=[], metavar="NAME=VALUE", help="Extra settings for the server")
+
+    compare_reports = subparsers.add_parser("compare", help="Compare two suite reports")
+    compare_reports.add_argument("before")
+    compare_reports.add_argument("after")
+
+    args = parser.parse_args()
+    if args.scenario == "compare":
+        compare(args)
+        return
+
+    results = asyncio.run(SCENARIOS[args.scenario](args))
+    report = {"scenario": args.scenario, "commit": git_commit(), "results": results}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+"""
+Local stand-in for the GitHub REST API used by the benchmarks.
+
+It serves synthetic repositories with configurable latency and size, supports
+pagination (Link headers), ETag conditional requests and X-RateLimit-* headers,
+and counts every request it receives and the bytes it sends so benchmarks can
+report API calls per tool. The /graphql endpoint understands the repository
+overview query sent by the server; it is not a general GraphQL implementation.
+
+Usage:
+    python fake_github.py --port 8765 --latency 0.05 --commits 1000 --branches 50
+    python fake_github.py --port 8765 --commits 100000 --branches 5000 --max-per-page 50 --rate-limit 1000
+"""
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlencode
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import time
+
+OWNER = "octocat"
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+class FakeGitHub:
+    """In-memory state of the fake API"""
+    def __init__(self, repos=3, commits=500, branches=20, pulls=5, latency=0.0, rate_limit=5000, mergeable_delay=0.0,
+                 max_per_page=100):
+        self.latency = latency
+        # Tamaño máximo de página que acepta per_page (100 en GitHub)
+        self.max_per_page = max_per_page
+        # Segundos que tarda GitHub en calcular mergeable tras un cambio en la PR o su base
+        self.mergeable_delay = mergeable_delay
+        self.rate_limit = rate_limit
+        self.remaining = rate_limit
+        self.reset = int(time.time()) + 3600
+        self.commit_count = commits
+        self.requests = Counter()
+        self.bytes = Counter()
+        self.repos = {}
+        for index in range(repos):
+            name = f"repo{index}"
+            self.repos[f"{OWNER}/{name}"] = {
+                "name": name,
+                "branches": {"master": self.commit_sha(name, 0)} | {
+                    f"branch-{n}": self.commit_sha(name, n % max(commits, 1)) for n in range(branches)
+                },
+                "pulls": {n: {
+                    "head": f"branch-{n}",
+                    "base": "master",
+                    "sha": self.commit_sha(name, n),
+                    "state": "open",
+                    "merged": False,
+                    "changed_at": time.time()
+                } for n in range(1, pulls + 1)}
+            }
+
+    def commit_sha(self, repo_name, index):
+        return hashlib.sha1(f"{repo_name}:{index}".encode()).hexdigest()
+
+    def repository(self, full_name):
+        repo = self.repos[full_name]
+        return {
+            "name": repo["name"],
+            "full_name": full_name,
+            "owner": {"login": OWNER},
+            "description": f"Synthetic repository {repo['name']}",
+            "html_url": f"https://github.com/{full_name}",
+            "default_branch": "master",
+            "private": False,
+            "created_at": "2020-01-01T00:00:00Z",
+            "updated_at": "2024-01-01T00:00:00Z",
+            "stargazers_count": 42,
+            "forks_count": 7,
+            "language": "Python"
+        }
+
+    def user(self, login):
+        return {
+            "login": login,
+            "id": 1,
+            "avatar_url": "https://avatars.githubusercontent.com/u/1?v=4",
+            "url": f"https://api.github.com/users/{login}",
+            "html_url": f"https://github.com/{login}",
+            "type": "User",
+            "site_admin": False
+        }
+
+    def commit(self, full_name, index):
+        # Misma forma (y tamaño aproximado) que la respuesta real de la API
+        name = self.repos[full_name]["name"]
+        sha = self.commit_sha(name, index)
+        parent = self.commit_sha(name, index + 1)
+        api = f"https://api.github.com/repos/{full_name}"
+        date = (EPOCH + timedelta(minutes=self.commit_count - index)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        person = {"name": f"Author {index % 17}", "email": "dev@example.com", "date": date}
+        return {
+            "sha": sha,
+            "node_id": f"C_{sha[:20]}",
+            "url": f"{api}/commits/{sha}",
+            "html_url": f"https://github.com/{full_name}/commit/{sha}",
+            "comments_url": f"{api}/commits/{sha}/comments",
+            "commit": {
+                "message": f"Synthetic commit {index}\n\nGenerated by fake_github.py",
+                "author": person,
+                "committer": person,
+                "tree": {"sha": self.commit_sha(name, -index - 1), "url": f"{api}/git/trees/{sha}"},
+                "url": f"{api}/git/commits/{sha}",
+                "comment_count": 0,
+                "verification": {"verified": False, "reason": "unsigned", "signature": None, "payload": None}
+            },
+            "author": self.user(OWNER),
+            "committer": self.user(OWNER),
+            "parents": [{"sha": parent, "url": f"{api}/commits/{parent}", "html_url": f"https://github.com/{full_name}/commit/{parent}"}]
+        }
+
+    def open_pulls(self, full_name):
+        return [n for n, pull in self.repos[full_name]["pulls"].items() if pull["state"] == "open"]
+
+    def pull(self, full_name, number):
+        pull = self.repos[full_name]["pulls"][number]
+        computed = time.time() - pull["changed_at"] >= self.mergeable_delay
+        mergeable = None if pull["state"] != "open" or not computed else True
+        return {
+            "number": number,
+            "title": f"Synthetic pull request {number}",
+            "html_url": f"https://github.com/{full_name}/pull/{number}",
+            "state": pull["state"],
+            "merged": pull["merged"],
+            "mergeable": mergeable,
+            "mergeable_state": "clean" if mergeable else "unknown",
+            "user": self.user(OWNER),
+            "created_at": "2024-01-01T00:00:00Z",
+            "head": {"ref": pull["head"], "sha": pull["sha"]},
+            "base": {"ref": pull["base"]}
+        }
+
+    def merge(self, full_name, number):
+        """Merge a pull request; the others on the same base need their mergeability recomputed"""
+        repo = self.repos[full_name]
+        pull = repo["pulls"][number]
+        pull["state"], pull["merged"] = "closed", True
+        sha = hashlib.sha1(f"merge:{full_name}:{number}".encode()).hexdigest()
+        repo["branches"][pull["base"]] = sha
+        for other in repo["pulls"].values():
+            if other["state"] == "open" and other["base"] == pull["base"]:
+                other["changed_at"] = time.time()
+            # Las PRs apiladas sobre la base cambian de head
+            if other["state"] == "open" and other["head"] == pull["base"]:
+                other["sha"] = sha
+                other["changed_at"] = time.time()
+        return sha
+
+def paginate(request, total, make_item):
+    """Return one page of a list and its Link header, like the GitHub API"""
+    state = request.app.state.github
+    per_page = min(int(request.query_params.get("per_page", 30)), state.max_per_page)
+    page = max(int(request.query_params.get("page", 1)), 1)
+    last = max((total + per_page - 1) // per_page, 1)
+    start = (page - 1) * per_page
+    items = [make_item(index) for index in range(start, min(start + per_page, total))]
+
+    links = []
+    params = dict(request.query_params)
+    base = str(request.url).split("?")[0]
+    if page < last:
+        links.append(f'<{base}?{urlencode({**params, "page": page + 1})}>; rel="next"')
+        links.append(f'<{base}?{urlencode({**params, "page": last})}>; rel="last"')
+    if page > 1:
+        links.append(f'<{base}?{urlencode({**params, "page": 1})}>; rel="first"')
+        links.append(f'<{base}?{urlencode({**params, "page": page - 1})}>; rel="prev"')
+    return items, ", ".join(links)
+
+def json_response(request, body, status=200, link=None):
+    """JSON response with an ETag; conditional requests get a 304"""
+    content = json.dumps(body).encode()
+    etag = f'"{hashlib.md5(content).hexdigest()}"'
+    headers = {"ETag": etag}
+    if link:
+        headers["Link"] = link
+    if status == 200 and request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content, status_code=status, headers=headers, media_type="application/json")
+
+def rate_limit_headers(state, resource="core"):
+    return {
+        "X-RateLimit-Limit": str(state.rate_limit),
+        "X-RateLimit-Remaining": str(max(state.remaining, 0)),
+        "X-RateLimit-Reset": str(state.reset),
+        "X-RateLimit-Resource": resource
+    }
+
+def graphql_page(query, variables, section, total, make_node):
+    """One page of a GraphQL connection; cursors are base64 encoded offsets"""
+    after = variables.get(f"{section}Cursor")
+    start = int(base64.b64decode(after)) if after else 0
+    end = min(start + variables["first"], total)
+    return {
+        "pageInfo": {"hasNextPage": end < total, "endCursor": base64.b64encode(str(end).encode()).decode()},
+        "nodes": [make_node(index) for index in range(start, end)]
+    }
+
+def not_found():
+    return JSONResponse({"message": "Not Found"}, status_code=404)
+
+def create_app(state):
+    async def count(request):
+        state.requests[f"{request.method} {request.scope['route_name']}"] += 1
+        if state.latency:
+            await asyncio.sleep(state.latency)
+
+    def route(path, name, methods=("GET",), resource="core"):
+        def decorator(handler):
+            async def endpoint(request: Request):
+                request.scope["route_name"] = name
+                await count(request)
+                if time.time() >= state.reset:
+                    state.remaining = state.rate_limit
+                    state.reset = int(time.time()) + 3600
+                if state.remaining <= 0:
+                    response = JSONResponse({"message": "API rate limit exceeded"}, status_code=403)
+                else:
+                    full_name = f"{request.path_params.get('owner')}/{request.path_params.get('repo')}"
+                    if "repo" in request.path_params and full_name not in state.repos:
+                        response = not_found()
+                    else:
+                        response = await handler(request, full_name)
+                    # Conditional requests answered with 304 are free
+                    if response.status_code != 304:
+                        state.remaining -= 1
+                response.headers.update(rate_limit_headers(state, resource))
+                state.bytes[f"{request.method} {name}"] += len(response.body)
+                return response
+            return Route(path, endpoint, methods=list(methods))
+        return decorator
+
+    @route("/user", "user")
+    async def user(request, _):
+        return json_response(request, {"login": OWNER})
+
+    @route("/user/repos", "user_repos")
+    async def user_repos(request, _):
+        names = list(state.repos)
+        items, link = paginate(request, len(names), lambda i: state.repository(names[i]))
+        return json_response(request, items, link=link)
+
+    @route("/repos/{owner}/{repo}", "repo")
+    async def repository(request, full_name):
+        return json_response(request, state.repository(full_name))
+
+    @route("/repos/{owner}/{repo}/branches", "branches")
+    async def branches(request, full_name):
+        names = list(state.repos[full_name]["branches"])
+        shas = state.repos[full_name]["branches"]
+        items, link = paginate(request, len(names), lambda i: {
+            "name": names[i],
+            "commit": {"sha": shas[names[i]], "url": f"https://api.github.com/repos/{full_name}/commits/{shas[names[i]]}"},
+            "protected": False
+        })
+        return json_response(request, items, link=link)
+
+    @route("/repos/{owner}/{repo}/branches/{branch:path}", "branch")
+    async def branch(request, full_name):
+        sha = state.repos[full_name]["branches"].get(request.path_params["branch"])
+        if sha is None:
+            return not_found()
+        return json_response(request, {"name": request.path_params["branch"], "commit": {"sha": sha}, "protected": False})
+
+    @route("/repos/{owner}/{repo}/pulls", "pulls")
+    async def pulls(request, full_name):
+        numbers = state.open_pulls(full_name)
+        items, link = paginate(request, len(numbers), lambda i: state.pull(full_name, numbers[i]))
+        return json_response(request, items, link=link)
+
+    @route("/repos/{owner}/{repo}/pulls/{number:int}", "pull")
+    async def pull(request, full_name):
+        number = request.path_params["number"]
+        if number not in state.repos[full_name]["pulls"]:
+            return not_found()
+        return json_response(request, state.pull(full_name, number))
+
+    @route("/repos/{owner}/{repo}/pulls/{number:int}/merge", "merge", methods=("PUT",))
+    async def merge(request, full_name):
+        number = request.path_params["number"]
+        if number not in state.repos[full_name]["pulls"]:
+            return not_found()
+        body = await request.json()
+        pull = state.pull(full_name, number)
+        if not pull["mergeable"]:
+            return JSONResponse({"message": "Pull Request is not mergeable"}, status_code=405)
+        if body.get("sha") and body["sha"] != pull["head"]["sha"]:
+            return JSONResponse({"message": "Head branch was modified. Review and try the merge again."}, status_code=409)
+        sha = state.merge(full_name, number)
+        return JSONResponse({"sha": sha, "merged": True, "message": "Pull Request successfully merged"})
+
+    @route("/repos/{owner}/{repo}/commits", "commits")
+    async def commits(request, full_name):
+        items, link = paginate(request, state.commit_count, lambda i: state.commit(full_name, i))
+        return json_response(request, items, link=link)
+
+    @route("/repos/{owner}/{repo}/git/ref/heads/{branch:path}", "ref")
+    async def ref(request, full_name):
+        branch = request.path_params["branch"]
+        sha = state.repos[full_name]["branches"].get(branch)
+        if sha is None:
+            return not_found()
+        return json_response(request, {"ref": f"refs/heads/{branch}", "object": {"sha": sha, "type": "commit"}})
+
+    @route("/repos/{owner}/{repo}/git/refs", "create_ref", methods=("POST",))
+    async def create_ref(request, full_name):
+        body = await request.json()
+        branches = state.repos[full_name]["branches"]
+        name = body["ref"].removeprefix("refs/heads/")
+        if name in branches:
+            return JSONResponse({"message": "Reference already exists"}, status_code=422)
+        branches[name] = body["sha"]
+        return JSONResponse({"ref": body["ref"], "object": {"sha": body["sha"], "type": "commit"}}, status_code=201)
+
+    @route("/repos/{owner}/{repo}/git/refs/heads/{branch:path}", "delete_ref", methods=("DELETE",))
+    async def delete_ref(request, full_name):
+        branches = state.repos[full_name]["branches"]
+        if branches.pop(request.path_params["branch"], None) is None:
+            return JSONResponse({"message": "Reference does not exist"}, status_code=422)
+        return Response(status_code=204)
+
+    @route("/graphql", "graphql", methods=("POST",), resource="graphql")
+    async def graphql(request, _):
+        body = await request.json()
+        query, variables = body["query"], body.get("variables", {})
+        full_name = f"{variables['owner']}/{variables['name']}"
+        if full_name not in state.repos:
+            return JSONResponse({"data": {"repository": None}, "errors": [
+                {"type": "NOT_FOUND", "message": f"Could not resolve to a Repository with the name '{full_name}'."}
+            ]})
+        repo = state.repos[full_name]
+        info = state.repository(full_name)
+        node = {
+            "name": info["name"],
+            "nameWithOwner": full_name,
+            "owner": {"login": OWNER},
+            "description": info["description"],
+            "url": info["html_url"],
+            "isPrivate": info["private"],
+            "createdAt": info["created_at"],
+            "updatedAt": info["updated_at"],
+            "stargazerCount": info["stargazers_count"],
+            "forkCount": info["forks_count"],
+            "primaryLanguage": {"name": info["language"]},
+            "defaultBranchRef": {"name": "master"}
+        }
+        if "refs(" in query:
+            names = list(repo["branches"])
+            node["branches"] = graphql_page(query, variables, "branches", len(names), lambda i: {
+                "name": names[i], "target": {"oid": repo["branches"][names[i]]}
+            })
+        if "pullRequests(" in query:
+            numbers = state.open_pulls(full_name)
+
+            def pull_node(i):
+                pull = state.pull(full_name, numbers[i])
+                return {
+                    "number": pull["number"], "title": pull["title"], "url": pull["html_url"], "state": "OPEN",
+                    "headRefName": pull["head"]["ref"], "baseRefName": pull["base"]["ref"],
+                    "author": {"login": OWNER}, "createdAt": "2024-01-01T00:00:00Z"
+                }
+            node["pull_requests"] = graphql_page(query, variables, "pull_requests", len(numbers), pull_node)
+        if "history(" in query:
+            def commit_node(i):
+                commit = state.commit(full_name, i)
+                return {"oid": commit["sha"], "message": commit["commit"]["message"], "url": commit["html_url"],
+                        "author": commit["commit"]["author"]}
+            node["commits"] = {"history": graphql_page(query, variables, "commits", state.commit_count, commit_node)}
+        return JSONResponse({"data": {"repository": node}})
+
+    async def stats(request):
+        return JSONResponse({
+            "requests": dict(state.requests),
+            "bytes": dict(state.bytes),
+            "total": sum(state.requests.values())
+        })
+
+    routes = [user, user_repos, repository, branches, branch, pulls, pull, merge, commits, ref, create_ref, delete_ref, graphql, Route("/_stats", stats)]
+    app = Starlette(routes=routes)
+    app.state.github = state
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the GitHub REST API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--repos", type=int, default=3)
+    parser.add_argument("--commits", type=int, default=500)
+    parser.add_argument("--branches", type=int, default=20)
+    parser.add_argument("--pulls", type=int, default=5)
+    parser.add_argument("--rate-limit", type=int, default=5000, help="Requests allowed per hour")
+    parser.add_argument("--mergeable-delay", type=float, default=0.0, help="Seconds until mergeable is computed")
+    parser.add_argument("--max-per-page", type=int, default=100, help="Largest page size served, whatever per_page asks for")
+    args = parser.parse_args()
+
+    import uvicorn
+    state = FakeGitHub(args.repos, args.commits, args.branches, args.pulls, args.latency, args.rate_limit,
+                       args.mergeable_delay, args.max_per_page)
+    uvicorn.run(create_app(state), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
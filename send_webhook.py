@@ -0,0 +1,51 @@
+"""
+Post recorded GitHub webhook payloads to the webhook listener of the server,
+signed with X-Hub-Signature-256 like GitHub does, so cache invalidation can be
+tested locally without GitHub.
+
+Usage:
+    python send_webhook.py --secret s3cret webhook_payloads/push.json
+    python send_webhook.py --secret s3cret --repository octocat/hello webhook_payloads/*.json
+"""
+from pathlib import Path
+import argparse
+import hashlib
+import hmac
+import json
+import sys
+import uuid
+
+import httpx
+
+def sign(secret, body):
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+def main():
+    parser = argparse.ArgumentParser(description="Post recorded GitHub webhook payloads")
+    parser.add_argument("payloads", nargs="+", help="JSON payload files; the event is the file name unless --event is given")
+    parser.add_argument("--url", default="http://127.0.0.1:8766/webhook")
+    parser.add_argument("--secret", required=True, help="Same value as GITHUB_WEBHOOK_SECRET")
+    parser.add_argument("--event", help="X-GitHub-Event header for every payload")
+    parser.add_argument("--repository", help="Replace repository.full_name in the payloads")
+    args = parser.parse_args()
+
+    failed = False
+    for path in map(Path, args.payloads):
+        payload = json.loads(path.read_text())
+        if args.repository:
+            payload["repository"]["full_name"] = args.repository
+            payload["repository"]["name"] = args.repository.split("/")[1]
+        body = json.dumps(payload).encode()
+        headers = {
+            "Content-Type": "application/json",
+            "X-GitHub-Event": args.event or path.stem,
+            "X-GitHub-Delivery": str(uuid.uuid4()),
+            "X-Hub-Signature-256": sign(args.secret, body)
+        }
+        response = httpx.post(args.url, content=body, headers=headers)
+        print(f"{path.name}: {response.status_code} {response.text}")
+        failed = failed or response.status_code != 200
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
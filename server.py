@@ -1,20 +1,135 @@
-from github import Github, Auth
-from git import Repo
-import requests
+import time
+
+# Process start, used to report how long startup and the first call take
+STARTED_AT = time.perf_counter()
+
+# PyGithub, GitPython, requests and python-dotenv are imported where they are
+# first needed so that the MCP handshake does not wait for them
 from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.server import _convert_to_content
+import httpx
 from pathlib import Path
 import sys
-from dotenv import load_dotenv
+from collections import OrderedDict, Counter
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from urllib.parse import urlencode, urlparse, parse_qs, unquote
+import threading
+import functools
+import contextlib
+import contextvars
+import itertools
+import bisect
+import hashlib
+import hmac
+import heapq
+import io
+import sqlite3
+import tempfile
+import inspect
+import re
+import logging
+import asyncio
+import base64
+import json
 import os
 
-mcp = FastMCP("GitHub Management")
+# Startup timings reported by server_stats
+startup_stats = {
+    "ready_ms": None,
+    "first_call_ms": None,
+    "first_call_at_ms": None
+}
+
+class GitHubMCP(FastMCP):
+    """
+    FastMCP server that records metrics for every tool call (see
+    ToolMetrics), profiles slow calls when GITHUB_PROFILE_SLOW_MS is set,
+    reports how long the first tool call took and, in shared mode, scopes
+    the repo_path of git tools to the calling session.
+    """
+    async def call_tool(self, name, arguments):
+        start = time.perf_counter()
+        tool = self._tool_manager.get_tool(name)
+        tool_token = current_tool.set(name if tool else None)
+        roots_token = None
+        profiler = start_profile() if tool else None
+        result = None
+        try:
+            if shared_mode and tool and 'repo_path' in tool.parameters.get('properties', {}):
+                roots_token = session_roots.set(await list_session_roots(self.get_context().session))
+            result = await self._tool_manager.call_tool(name, arguments, context=self.get_context())
+            return _convert_to_content(result)
+        finally:
+            elapsed = time.perf_counter() - start
+            if roots_token is not None:
+                session_roots.reset(roots_token)
+            current_tool.reset(tool_token)
+            if tool:
+                # Las herramientas informan de sus errores devolviendo {"error": ...}
+                tool_metrics.record_call(name, elapsed, error=not isinstance(result, dict) or "error" in result)
+            if profiler:
+                finish_profile(profiler, name, elapsed)
+            if startup_stats["first_call_ms"] is None:
+                end = time.perf_counter()
+                startup_stats["first_call_ms"] = round((end - start) * 1000, 1)
+                startup_stats["first_call_at_ms"] = round((end - STARTED_AT) * 1000, 1)
+                print(f"First tool call ({name}) took {startup_stats['first_call_ms']} ms, "
+                      f"{startup_stats['first_call_at_ms']} ms after process start", file=sys.stderr)
+
+mcp = GitHubMCP("GitHub Management")
+
+# In shared mode (--transport sse) one process serves many clients, so the
+# working directory of the server is not the one of any client
+shared_mode = False
+
+# Roots declared by the client of the current tool call, in shared mode
+session_roots = contextvars.ContextVar('session_roots', default=None)
+
+# Tool whose call is running, to attribute upstream requests to it
+current_tool = contextvars.ContextVar('current_tool', default=None)
+
+async def list_session_roots(session):
+    """Local directories declared by the client as its roots; [] if it declares none"""
+    try:
+        result = await session.list_roots()
+    except Exception as e:
+        print(f"Could not list the roots of the session: {e}", file=sys.stderr)
+        return []
+    return [Path(unquote(urlparse(str(root.uri)).path)).resolve() for root in result.roots]
+
+def session_repo_path(repo_path):
+    """
+    Resolve repo_path for the current session. In shared mode relative paths
+    start at the first root of the client and paths outside its roots are
+    rejected; otherwise they start at the working directory of the process.
+    """
+    roots = session_roots.get()
+    if roots is None:
+        return Path(repo_path).resolve()
+    if not roots:
+        raise ValueError("This session did not declare any roots; git tools need them when the server is shared")
+    path = (roots[0] / repo_path).resolve()
+    if not any(path == root or root in path.parents for root in roots):
+        raise ValueError(f"{repo_path} is outside the roots of this session")
+    return path
+
+# httpx logs every request at INFO level; keep stderr readable
+logging.getLogger("httpx").setLevel(logging.WARNING)
 
 # Global variable for Github client
 g = None
 
-def load_environment():
+# .env file read by load_environment; other local files are kept next to it
+loaded_env_path = None
+
+def get_env_path():
+    return Path(__file__).parent / '.env'
+
+def load_environment(env_path=None):
     """Load environment variables from .env file with enhanced debugging"""
-    env_path = Path(__file__).parent / '.env'
+    global loaded_env_path, github_config
+    env_path = Path(env_path).resolve() if env_path else get_env_path()
     print(f"Looking for .env file at: {env_path}", file=sys.stderr)
     
     if not env_path.exists():
@@ -33,6 +148,7 @@ def load_environment():
         raise ValueError(".env file is empty")
     
     # Load the environment variables
+    from dotenv import load_dotenv
     load_dotenv(env_path, override=True)
     
     # Verify that variables were loaded
@@ -42,21 +158,52 @@ def load_environment():
     else:
         raise ValueError("GITHUB_TOKEN not loaded from .env file")
         
+    loaded_env_path = env_path
+    github_config = None
     return env_path
 
 def verify_token(token):
-    headers = {
-        'Authorization': f'token {token}',  # Cambiado de 'Bearer' a 'token'
-        'Accept': 'application/vnd.github.v3+json'
-    }
-    response = requests.get('https://api.github.com/user', headers=headers)
-    print(f"Response status: {response.status_code}")
-    print(f"Response headers: {response.headers}")
-    if response.status_code == 200:
-        return True, response.json()
-    return False, response.status_code
+    """Check a token against GET /user over the pooled PyGithub transport"""
+    from github import Auth
+    key = token_key(token)
+    entry = next((e for e in get_token_pool().entries if e.label == key), None) or PoolToken(key, Auth.Token(token))
+    status, headers, body = entry.client.requester.requestJson("GET", "/user")
+    # stdout es el canal del protocolo MCP: los diagnósticos van a stderr
+    print(f"Token check status: {status} "
+          f"(rate limit remaining: {headers.get('x-ratelimit-remaining')})", file=sys.stderr)
+    if status == 200:
+        return True, json.loads(body)
+    return False, status
+
+# Result of the token validation, which runs in the background at startup
+token_check = None
+
+def start_token_check():
+    """Validate GITHUB_TOKEN in a background thread; returns a Future of verify_token()"""
+    global token_check
+    if token_check is None:
+        token_check = Future()
+        token = get_github_config().get('token')
+
+        def check():
+            try:
+                token_check.set_result(verify_token(token))
+            except Exception as e:
+                token_check.set_exception(e)
+        threading.Thread(target=check, daemon=True).start()
+    return token_check
+
+# Configuración leída del entorno en el primer uso; load_environment la descarta
+github_config = None
 
 def get_github_config():
+    """Get GitHub configuration from environment variables, read once (see read_github_config)"""
+    global github_config
+    if github_config is None:
+        github_config = read_github_config()
+    return github_config
+
+def read_github_config():
     """Get GitHub configuration from environment variables."""
     token = os.getenv('GITHUB_TOKEN')
     if not token:
@@ -70,9 +217,1084 @@ def get_github_config():
         'token': token,
         'username': os.getenv('GITHUB_USERNAME', 'alvnavraii'),
         'defaultBranch': os.getenv('GITHUB_DEFAULT_BRANCH', 'master'),
-        'repository': os.getenv('GITHUB_REPOSITORY', 'MCPGithub')
+        'repository': os.getenv('GITHUB_REPOSITORY', 'MCPGithub'),
+        'apiUrl': os.getenv('GITHUB_API_URL', 'https://api.github.com').rstrip('/'),
+        'cacheSize': int(os.getenv('GITHUB_CACHE_SIZE', '512')),
+        'repoCacheSize': int(os.getenv('GITHUB_REPO_CACHE_SIZE', '128')),
+        'repoCacheTtl': float(os.getenv('GITHUB_REPO_CACHE_TTL', '300')),
+        'pageWorkers': int(os.getenv('GITHUB_PAGE_WORKERS', '8')),
+        'batchWorkers': int(os.getenv('GITHUB_BATCH_WORKERS', '8')),
+        'maxConcurrency': int(os.getenv('GITHUB_MAX_CONCURRENCY', '16')),
+        'writeRate': float(os.getenv('GITHUB_WRITE_RATE', '1.0')),
+        'writeBurst': int(os.getenv('GITHUB_WRITE_BURST', '5')),
+        'rateLimitReserve': int(os.getenv('GITHUB_RATE_LIMIT_RESERVE', '100')),
+        'rateLimitMaxWait': float(os.getenv('GITHUB_RATE_LIMIT_MAX_WAIT', '300')),
+        'tokens': [t.strip() for t in os.getenv('GITHUB_TOKENS', '').split(',') if t.strip()],
+        'appId': os.getenv('GITHUB_APP_ID'),
+        'appPrivateKeyPath': os.getenv('GITHUB_APP_PRIVATE_KEY_PATH'),
+        'appInstallationIds': [i.strip() for i in os.getenv('GITHUB_APP_INSTALLATION_IDS', '').split(',') if i.strip()],
+        'diskCache': os.getenv('GITHUB_DISK_CACHE', 'false').lower() in ('1', 'true', 'yes'),
+        'diskCacheMaxMb': float(os.getenv('GITHUB_DISK_CACHE_MAX_MB', '64')),
+        'verifyToken': os.getenv('GITHUB_VERIFY_TOKEN', 'background').lower(),
+        'httpTimeout': int(os.getenv('GITHUB_HTTP_TIMEOUT', '30')),
+        'httpPoolSize': int(os.getenv('GITHUB_HTTP_POOL_SIZE', '20')),
+        'httpRetries': int(os.getenv('GITHUB_HTTP_RETRIES', '3')),
+        'mirrorDir': os.getenv('GITHUB_MIRROR_DIR', ''),
+        'mirrorUrl': os.getenv('GITHUB_MIRROR_URL', ''),
+        'mirrorFetchInterval': float(os.getenv('GITHUB_MIRROR_FETCH_INTERVAL', '60')),
+        'gitRepoPoolSize': int(os.getenv('GITHUB_GIT_REPO_POOL_SIZE', '16')),
+        'gitFsmonitor': os.getenv('GITHUB_GIT_FSMONITOR', ''),
+        'mergePollInterval': float(os.getenv('GITHUB_MERGE_POLL_INTERVAL', '0.25')),
+        'mergeTimeout': float(os.getenv('GITHUB_MERGE_TIMEOUT', '120')),
+        'cacheTtl': float(os.getenv('GITHUB_CACHE_TTL', '0')),
+        'webhookHost': os.getenv('GITHUB_WEBHOOK_HOST', '127.0.0.1'),
+        'webhookPort': int(os.getenv('GITHUB_WEBHOOK_PORT', '0')),
+        'webhookSecret': os.getenv('GITHUB_WEBHOOK_SECRET', ''),
+        'metricsHost': os.getenv('GITHUB_METRICS_HOST', '127.0.0.1'),
+        'metricsPort': int(os.getenv('GITHUB_METRICS_PORT', '0')),
+        'profileSlowMs': float(os.getenv('GITHUB_PROFILE_SLOW_MS', '0')),
+        'profileDir': os.getenv('GITHUB_PROFILE_DIR', '')
+    }
+
+class GitHubAPIError(Exception):
+    """Error response returned by the GitHub REST API"""
+    def __init__(self, status, message):
+        super().__init__(f"{status} {message}")
+        self.status = status
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with hit/miss counters.
+    If ttl (seconds) is given, entries older than ttl are treated as missing.
+    """
+    def __init__(self, max_entries=256, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, stored_at = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        """Remove key, ignoring case like pop_prefix, and return its value"""
+        folded = key.lower()
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            for other in [other for other in self._entries if other.lower() == folded]:
+                entry = entry or self._entries[other]
+                del self._entries[other]
+            return entry[0] if entry else None
+
+    def pop_prefix(self, prefix):
+        """Remove every entry whose key starts with prefix, ignoring case like GitHub URLs do"""
+        prefix = prefix.lower()
+        with self._lock:
+            keys = [key for key in self._entries if key.lower().startswith(prefix)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else None
+            }
+
+def fast_status_options():
+    """
+    git -c options passed to every command of the git tools: the untracked
+    cache lets git skip directories whose mtime did not change, and
+    GITHUB_GIT_FSMONITOR ('true' for the built-in daemon, or a hook path)
+    lets a file system monitor report the changed paths.
+    """
+    options = ['core.untrackedCache=true']
+    fsmonitor = get_github_config()['gitFsmonitor']
+    if fsmonitor:
+        options.append(f"core.fsmonitor={fsmonitor}")
+    return options
+
+class RepoPool:
+    """
+    Open GitPython Repo handles keyed by resolved path (see session_repo_path).
+    Reusing a handle keeps its persistent git cat-file processes alive across
+    tool calls; evicted handles are closed. A handle is used by one thread at
+    a time, since those processes are not thread-safe.
+    """
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def open(self, repo_path):
+        from git import Repo
+        path = str(session_repo_path(repo_path))
+        evicted = []
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                self.misses += 1
+                repo = Repo(path)
+                # Opciones para que status/add solo examinen lo que cambió
+                repo.git.set_persistent_git_options(c=fast_status_options())
+                entry = (repo, threading.Lock())
+                self._entries[path] = entry
+                while len(self._entries) > self.max_entries:
+                    evicted.append(self._entries.popitem(last=False)[1])
+            else:
+                self.hits += 1
+                self._entries.move_to_end(path)
+        for old_repo, old_lock in evicted:
+            with old_lock:
+                old_repo.close()
+        repo, lock = entry
+        with lock:
+            yield repo
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / (self.hits + self.misses), 4) if self.hits + self.misses else None
+            }
+
+class DiskCache:
+    """
+    SQLite store of GitHub API responses that survives restarts.
+    It keeps the same entries as the in-memory response cache (validators,
+    body and links) plus timestamps, and evicts the least recently used
+    entries once the stored bodies exceed max_bytes.
+    """
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body TEXT NOT NULL,
+                links TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self._db.commit()
+
+    def get(self, url):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, body, links FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE responses SET last_access = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+            self.hits += 1
+        return {
+            'etag': row[0],
+            'last_modified': row[1],
+            'body': json.loads(row[2]),
+            'links': json.loads(row[3])
+        }
+
+    def put(self, url, entry, body_text):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, entry['etag'], entry['last_modified'], body_text, json.dumps(entry['links']), now, now, len(body_text))
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Se libera hasta el 90 % del límite para no desalojar en cada escritura
+        target = self.max_bytes * 0.9
+        for url, size in self._db.execute("SELECT url, size FROM responses ORDER BY last_access").fetchall():
+            if total <= target:
+                break
+            self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+            self.evictions += 1
+
+    def pop(self, url):
+        with self._lock:
+            self._db.execute("DELETE FROM responses WHERE lower(url) = lower(?)", (url,))
+            self._db.commit()
+
+    def pop_prefix(self, prefix):
+        with self._lock:
+            self._db.execute("DELETE FROM responses WHERE lower(substr(url, 1, ?)) = lower(?)", (len(prefix), prefix))
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {
+            "path": str(self.path),
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "evictions": self.evictions
+        }
+
+class RequestScheduler:
+    """
+    Central gate for outgoing GitHub API calls.
+
+    It tracks the quota reported by the API for each token, bounds the number
+    of requests in flight and paces mutating requests with a token bucket.
+    Calls that would hit a rate limit are delayed instead of failing: every
+    call waits out a Retry-After or an exhausted quota, and once the quota
+    drops to the reserve, reads wait for the reset so the remaining requests
+    go to writes. Writes are also served first when slots are contended.
+    """
+    def __init__(self, max_concurrency=16, write_rate=1.0, write_burst=5, reserve=100, max_wait=300):
+        self.max_concurrency = max_concurrency
+        self.write_rate = write_rate
+        self.write_burst = write_burst
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.quota = {}
+        self.requests = Counter()
+        self.blocked_until = {}
+        self.active = 0
+        self.delayed = 0
+        self.retried = 0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._write_tokens = write_burst
+        self._write_updated = time.monotonic()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, token_key, write=False, resource='core'):
+        """Hold one request slot for token_key while the body runs"""
+        await self._wait_for_quota(token_key, write, resource)
+        await self._enter(0 if write else 1)
+        try:
+            if write:
+                await self._take_write_token()
+            yield
+        finally:
+            self._leave()
+
+    async def _wait_for_quota(self, token_key, write, resource):
+        while True:
+            now = time.time()
+            wait = self.blocked_until.get(token_key, 0) - now
+            quota = self.quota.get(token_key, {}).get(resource)
+            if wait <= 0 and quota and quota['reset'] > now:
+                if quota['remaining'] == 0 or (not write and quota['remaining'] <= self.reserve):
+                    wait = quota['reset'] - now
+            if wait <= 0:
+                return
+            if wait > self.max_wait:
+                raise GitHubAPIError(429, f"Rate limit for {token_key} exhausted, resets in {wait:.0f}s")
+            self.delayed += 1
+            await asyncio.sleep(wait)
+
+    async def _enter(self, priority):
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        try:
+            # _leave() hands its slot over by resolving the future
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._leave()
+            raise
+
+    def _leave(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    async def _take_write_token(self):
+        while True:
+            now = time.monotonic()
+            self._write_tokens = min(self.write_burst, self._write_tokens + (now - self._write_updated) * self.write_rate)
+            self._write_updated = now
+            if self._write_tokens >= 1:
+                self._write_tokens -= 1
+                return
+            await asyncio.sleep((1 - self._write_tokens) / self.write_rate)
+
+    def update(self, token_key, headers):
+        """Record the quota reported in the X-RateLimit-* response headers"""
+        self.requests[token_key] += 1
+        remaining = headers.get('X-RateLimit-Remaining')
+        if remaining is None:
+            return
+        resource = headers.get('X-RateLimit-Resource', 'core')
+        self.quota.setdefault(token_key, {})[resource] = {
+            'remaining': int(remaining),
+            'limit': int(headers.get('X-RateLimit-Limit', 0)),
+            'reset': int(headers.get('X-RateLimit-Reset', 0))
+        }
+
+    def update_from_requester(self, token_key, requester):
+        """Record the quota PyGithub saw on its last response"""
+        self.requests[token_key] += 1
+        remaining, limit = requester.rate_limiting
+        if remaining >= 0:
+            self.quota.setdefault(token_key, {})['core'] = {
+                'remaining': remaining,
+                'limit': limit,
+                'reset': requester.rate_limiting_resettime
+            }
+
+    def retry_delay(self, token_key, response, attempt):
+        """
+        Seconds to wait before retrying a rate-limited response, or None if
+        the response is not a rate limit error. The token is blocked for
+        that long so that other calls queue behind it.
+        """
+        if response.status_code not in (403, 429):
+            return None
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            delay = float(retry_after)
+        elif response.headers.get('X-RateLimit-Remaining') == '0':
+            delay = max(int(response.headers.get('X-RateLimit-Reset', 0)) - time.time(), 1)
+        elif 'secondary rate limit' in response.text.lower():
+            delay = 60 * 2 ** attempt
+        else:
+            return None
+        self.blocked_until[token_key] = max(self.blocked_until.get(token_key, 0), time.time() + delay)
+        self.retried += 1
+        return delay
+
+    def stats(self):
+        return {
+            "active": self.active,
+            "queued": sum(1 for _, _, future in self._waiters if not future.done()),
+            "delayed": self.delayed,
+            "retried": self.retried,
+            "quota": self.quota
+        }
+
+class PoolToken:
+    """One credential of the token pool, with its own PyGithub client"""
+    def __init__(self, label, auth):
+        self.label = label
+        self.auth = auth
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                from github import Github
+                from github.GithubRetry import GithubRetry
+                config = get_github_config()
+                # Mismos límites de conexiones, timeout y reintentos que el cliente httpx
+                self._client = Github(
+                    auth=self.auth,
+                    base_url=config['apiUrl'],
+                    timeout=config['httpTimeout'],
+                    retry=GithubRetry(total=config['httpRetries']),
+                    pool_size=config['httpPoolSize'],
+                    # El scheduler ya espacía las peticiones y las escrituras
+                    seconds_between_requests=None,
+                    seconds_between_writes=None
+                )
+            return self._client
+
+    @property
+    def is_app(self):
+        from github import Auth
+        return isinstance(self.auth, Auth.AppInstallationAuth)
+
+    def get_token(self):
+        """Current token; installation tokens are minted and refreshed by PyGithub"""
+        if self.is_app:
+            # La autenticación de la instalación necesita el requester del cliente
+            self.client
+        return self.auth.token
+
+class TokenPool:
+    """
+    Tokens the server spreads its API calls over.
+    Repository reads go to the token with the most remaining quota; requests
+    that are not scoped to a repository, and writes, prefer the primary token
+    (GITHUB_TOKEN). A repository that only some tokens can access is pinned
+    to the first token that succeeded.
+    """
+    def __init__(self, entries):
+        self.entries = entries
+        self.pinned = {}
+
+    @property
+    def primary(self):
+        return self.entries[0]
+
+    def remaining(self, entry):
+        quota = get_scheduler().quota.get(entry.label, {}).get('core')
+        # Los tokens que aún no se han usado se prueban primero
+        if not quota or quota['reset'] <= time.time():
+            return float('inf')
+        return quota['remaining']
+
+    def candidates(self, repository_full_name=None, write=False):
+        """Tokens to try for a request, best first"""
+        if not repository_full_name:
+            return [self.primary]
+        pinned = self.pinned.get(repository_full_name.lower())
+        if pinned:
+            return [pinned]
+        if write:
+            return list(self.entries)
+        return sorted(self.entries, key=self.remaining, reverse=True)
+
+    def pin(self, repository_full_name, entry):
+        self.pinned[repository_full_name.lower()] = entry
+
+    def entry_for(self, requester):
+        """Pool entry whose client issued a PyGithub object"""
+        for entry in self.entries:
+            if requester.auth is entry.auth:
+                return entry
+        return self.primary
+
+    def stats(self):
+        scheduler = get_scheduler()
+        return [{
+            "label": entry.label,
+            "type": "app_installation" if entry.is_app else "token",
+            "requests": scheduler.requests[entry.label],
+            "quota": scheduler.quota.get(entry.label, {}).get('core'),
+            "pinned_repositories": sorted(name for name, pinned in self.pinned.items() if pinned is entry)
+        } for entry in self.entries]
+
+def create_token_pool():
+    """
+    Build the token pool from GITHUB_TOKEN, the comma-separated GITHUB_TOKENS
+    and, if GITHUB_APP_ID is set, one installation token per id listed in
+    GITHUB_APP_INSTALLATION_IDS.
+    """
+    from github import Auth
+    config = get_github_config()
+    tokens = []
+    for token in [config.get('token')] + config['tokens']:
+        if token and token not in tokens:
+            tokens.append(token)
+    entries = [PoolToken(token_key(token), Auth.Token(token)) for token in tokens]
+
+    if config['appId'] and config['appPrivateKeyPath']:
+        private_key = Path(config['appPrivateKeyPath']).read_text()
+        app_auth = Auth.AppAuth(config['appId'], private_key)
+        for installation_id in config['appInstallationIds']:
+            entries.append(PoolToken(
+                f"app-installation-{installation_id}",
+                app_auth.get_installation_auth(int(installation_id))
+            ))
+
+    if not entries:
+        raise ValueError("GITHUB_TOKEN environment variable is not set")
+    return TokenPool(entries)
+
+def git_auth_env(token):
+    """
+    Environment that makes git send the token as an HTTP header, so it never
+    ends up in a remote URL or in the repository configuration.
+    """
+    credentials = base64.b64encode(f"x-access-token:{token}".encode()).decode()
+    return {
+        'GIT_TERMINAL_PROMPT': '0',
+        'GIT_CONFIG_COUNT': '1',
+        'GIT_CONFIG_KEY_0': 'http.extraheader',
+        'GIT_CONFIG_VALUE_0': f"AUTHORIZATION: basic {credentials}"
     }
 
+def web_url():
+    """Web host matching GITHUB_API_URL (https://github.com for the public API)"""
+    api_url = get_github_config()['apiUrl'].rstrip('/')
+    if api_url == 'https://api.github.com':
+        return 'https://github.com'
+    return api_url.removesuffix('/api/v3')
+
+# owner/repository, as accepted by GitHub
+REPOSITORY_FULL_NAME = re.compile(r'^[\w.-]+/[\w.-]+$')
+
+class MirrorStore:
+    """
+    Bare clones of GitHub repositories used to answer commit and branch
+    listings from the local object database instead of the API.
+    Each mirror is updated with an incremental git fetch at most once every
+    fetch_interval seconds, or on the next read after a write made through
+    the server.
+    """
+    def __init__(self, root, url_template, fetch_interval):
+        self.root = Path(root)
+        self.url_template = url_template
+        self.fetch_interval = fetch_interval
+        self.fetched_at = {}
+        self.fetches = 0
+        self.queries = 0
+        self._locks = {}
+
+    def path(self, repository_full_name):
+        # El nombre viene del cliente: no puede salirse de root
+        if not REPOSITORY_FULL_NAME.match(repository_full_name) or {'.', '..'} & set(repository_full_name.split('/')):
+            raise ValueError(f"Invalid repository name: {repository_full_name}")
+        owner, name = repository_full_name.lower().split('/', 1)
+        return self.root / owner / f"{name}.git"
+
+    def mark_stale(self, repository_full_name):
+        self.fetched_at.pop(repository_full_name.lower(), None)
+
+    async def get(self, repository_full_name):
+        """Return the git.Repo of an up-to-date mirror, creating it if needed"""
+        from git import Repo
+        key = repository_full_name.lower()
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            fetched_at = self.fetched_at.get(key)
+            if fetched_at is None or time.monotonic() - fetched_at >= self.fetch_interval:
+                await self._fetch(repository_full_name)
+                self.fetched_at[key] = time.monotonic()
+        self.queries += 1
+        return Repo(self.path(repository_full_name))
+
+    async def _fetch(self, repository_full_name):
+        from git import Repo
+        entry = get_token_pool().candidates(repository_full_name, write=False)[0]
+        token = await asyncio.to_thread(entry.get_token) if entry.is_app else entry.get_token()
+        url = self.url_template.format(repository_full_name=repository_full_name)
+        path = self.path(repository_full_name)
+
+        def fetch():
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                Repo.init(path, bare=True)
+            repo = Repo(path)
+            # Solo se descargan los objetos nuevos desde el último fetch
+            repo.git.fetch(url, '+refs/heads/*:refs/heads/*', '+refs/tags/*:refs/tags/*',
+                           '--prune', env=git_auth_env(token))
+            # commit-graph con filtros de Bloom por ruta: acelera git log y los filtros por path
+            repo.git.commit_graph('write', '--reachable', '--changed-paths', '--split')
+
+        await asyncio.to_thread(fetch)
+        self.fetches += 1
+
+    async def commits(self, repository_full_name, rev, skip, count, since=None, until=None, author=None, path=None):
+        """Commits reachable from rev, newest first, in the format of list_commits"""
+        if rev.startswith('-'):
+            raise ValueError(f"Invalid revision: {rev}")
+        repo = await self.get(repository_full_name)
+        args = ['--format=%H%x1f%an%x1f%aI%x1f%B%x1e', f'--skip={skip}', f'--max-count={count}']
+        if since:
+            args.append(f'--since={since}')
+        if until:
+            args.append(f'--until={until}')
+        if author:
+            args.append(f'--author={author}')
+        # Lo que sigue a --end-of-options nunca se interpreta como una opción
+        args += ['--end-of-options', rev]
+        if path:
+            args += ['--', path]
+        output = await asyncio.to_thread(repo.git.log, *args)
+
+        base_url = f"{web_url()}/{repository_full_name}/commit"
+        commits = []
+        for record in output.split('\x1e'):
+            record = record.strip('\n')
+            if not record:
+                continue
+            sha, name, date, message = record.split('\x1f', 3)
+            commits.append({
+                "sha": sha,
+                "message": message.rstrip('\n'),
+                "author": name,
+                "date": datetime.fromisoformat(date).astimezone(timezone.utc).isoformat(),
+                "url": f"{base_url}/{sha}"
+            })
+        return commits
+
+    async def branches(self, repository_full_name):
+        repo = await self.get(repository_full_name)
+        output = await asyncio.to_thread(repo.git.for_each_ref, '--format=%(refname:lstrip=2)', 'refs/heads')
+        return [{"name": name} for name in output.splitlines()]
+
+    def stats(self):
+        return {
+            "repositories": len(self.fetched_at),
+            "fetches": self.fetches,
+            "queries": self.queries
+        }
+
+# Cache of GitHub API responses keyed by request URL. Each entry keeps the
+# ETag/Last-Modified validators so the next request can be conditional.
+response_cache = None
+
+# Shared keep-alive client for the REST calls made by the async tools. It is
+# bound to the event loop it was created in. PyGithub clients use their own
+# requests session, configured with the same pool size, timeout and retries.
+http_client = None
+http_client_loop = None
+
+# Cache of PyGithub Repository objects keyed by lowercase full name, so tools
+# working on the same repository skip the GET /repos/{owner}/{repo} round trip.
+repository_cache = None
+
+def get_response_cache():
+    global response_cache
+    if response_cache is None:
+        response_cache = LRUCache(get_github_config()['cacheSize'])
+    return response_cache
+
+# Optional persistent copy of the response cache, stored next to the .env file
+disk_cache = None
+
+# Scheduler shared by every outgoing GitHub API call
+scheduler = None
+
+# Pool of tokens used for the GitHub API calls
+token_pool = None
+
+# Handles of the local repositories used by the git_* tools
+repo_pool = None
+
+def get_repo_pool():
+    global repo_pool
+    if repo_pool is None:
+        repo_pool = RepoPool(get_github_config()['gitRepoPoolSize'])
+    return repo_pool
+
+# Local bare clones used by list_commits/list_branches when GITHUB_MIRROR_DIR is set
+mirror_store = None
+
+def get_mirror_store():
+    """Return the mirror store, or None if GITHUB_MIRROR_DIR is not set"""
+    global mirror_store
+    config = get_github_config()
+    if mirror_store is None and config['mirrorDir']:
+        url_template = config['mirrorUrl'] or f"{web_url()}/{{repository_full_name}}.git"
+        mirror_store = MirrorStore(config['mirrorDir'], url_template, config['mirrorFetchInterval'])
+    return mirror_store
+
+def get_token_pool():
+    global token_pool
+    if token_pool is None:
+        token_pool = create_token_pool()
+    return token_pool
+
+def get_scheduler():
+    global scheduler
+    if scheduler is None:
+        config = get_github_config()
+        scheduler = RequestScheduler(
+            max_concurrency=config['maxConcurrency'],
+            write_rate=config['writeRate'],
+            write_burst=config['writeBurst'],
+            reserve=config['rateLimitReserve'],
+            max_wait=config['rateLimitMaxWait']
+        )
+    return scheduler
+
+def get_disk_cache():
+    """Return the persistent response cache, or None if GITHUB_DISK_CACHE is off"""
+    global disk_cache
+    config = get_github_config()
+    if disk_cache is None and config['diskCache']:
+        path = (loaded_env_path or get_env_path()).with_name('.github_cache.sqlite3')
+        disk_cache = DiskCache(path, int(config['diskCacheMaxMb'] * 1024 * 1024))
+    return disk_cache
+
+def get_repository_cache():
+    global repository_cache
+    if repository_cache is None:
+        config = get_github_config()
+        repository_cache = LRUCache(config['repoCacheSize'], ttl=config['repoCacheTtl'])
+    return repository_cache
+
+def invalidate_repository(repository_full_name):
+    """Drop the cached handle and API responses of a repository, and the cached repository lists"""
+    get_repository_cache().pop(repository_full_name.lower())
+    if get_mirror_store():
+        get_mirror_store().mark_stale(repository_full_name)
+    api_url = get_github_config()['apiUrl']
+    for cache in (get_response_cache(), get_disk_cache()):
+        if cache is not None:
+            cache.pop_prefix(f"{api_url}/repos/{repository_full_name}/")
+            cache.pop(f"{api_url}/repos/{repository_full_name}")
+            cache.pop_prefix(f"{api_url}/user/repos")
+
+def get_http_client():
+    global http_client, http_client_loop
+    loop = asyncio.get_running_loop()
+    if http_client is None or http_client_loop is not loop:
+        config = get_github_config()
+        limits = httpx.Limits(
+            max_connections=config['httpPoolSize'],
+            max_keepalive_connections=config['httpPoolSize'],
+            keepalive_expiry=60
+        )
+        http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(config['httpTimeout'], connect=10),
+            limits=limits,
+            # Reintenta los errores de conexión; los 5xx se reintentan en send_github_request
+            transport=httpx.AsyncHTTPTransport(retries=config['httpRetries'], limits=limits)
+        )
+        http_client_loop = loop
+    return http_client
+
+def api_headers(token):
+    return {
+        'Authorization': f'token {token}',  # Cambiado de 'Bearer' a 'token'
+        'Accept': 'application/vnd.github.v3+json'
+    }
+
+def token_key(token):
+    """Stable identifier of a token that does not reveal it"""
+    return f"token-{hashlib.sha256(token.encode()).hexdigest()[:8]}"
+
+# Number of times a rate-limited request is retried
+RATE_LIMIT_RETRIES = 3
+
+# Transient server errors retried (GITHUB_HTTP_RETRIES times) for idempotent methods
+TRANSIENT_STATUSES = (502, 503, 504)
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'PUT', 'DELETE')
+
+async def github_request(method, url, headers=None, json_body=None, token=None, write=None, resource='core'):
+    """
+    Send a request to the GitHub REST API through the scheduler.
+    Unless an explicit token is given, the token is picked from the pool; if
+    a repository answers 403/404 with one token the next one is tried.
+    Requests other than GET/HEAD count as writes unless write is given.
+    """
+    config = get_github_config()
+    if not url.startswith('http'):
+        url = f"{config['apiUrl']}{url}"
+    if write is None:
+        write = method not in ('GET', 'HEAD')
+    match = re.search(r'/repos/([^/]+/[^/?]+)([^?]*)', url)
+    repository_full_name = match.group(1) if match else None
+    if token:
+        response = await send_github_request(method, url, headers, json_body, token, token_key(token), write, resource)
+    else:
+        pool = get_token_pool()
+        candidates = pool.candidates(repository_full_name, write)
+        for index, entry in enumerate(candidates):
+            token = await asyncio.to_thread(entry.get_token) if entry.is_app else entry.get_token()
+            response = await send_github_request(method, url, headers, json_body, token, entry.label, write, resource)
+            if response.status_code not in (403, 404) or index + 1 == len(candidates):
+                break
+        if index and response.status_code < 400:
+            pool.pin(repository_full_name, entry)
+    # Las ramas cambiadas desde el servidor se ven en el siguiente listado
+    if write and repository_full_name and get_mirror_store():
+        get_mirror_store().mark_stale(repository_full_name)
+    # ... y, aunque haya GITHUB_CACHE_TTL, no se sirven respuestas en caché que la escritura dejó obsoletas
+    if write and repository_full_name and response.status_code < 400 and write_event(match.group(2)):
+        drop_cached_responses(repository_full_name, write_event(match.group(2)))
+    return response
+
+async def send_github_request(method, url, headers, json_body, token, key, write, resource='core'):
+    """
+    Send one request with the given token.
+    Rate-limited answers (Retry-After, exhausted quota or secondary rate
+    limit) are retried once the scheduler lets the token through again, and
+    idempotent requests are retried with exponential backoff on 502/503/504.
+    """
+    scheduler = get_scheduler()
+    retries = get_github_config()['httpRetries']
+    request_headers = {**api_headers(token), **(headers or {})}
+    # Cada tipo de reintento tiene su propio límite: los 502 previos no gastan los de rate limit
+    transient_attempts = rate_limit_attempts = 0
+    while True:
+        async with scheduler.slot(key, write=write, resource=resource):
+            response = await get_http_client().request(method, url, headers=request_headers, json=json_body)
+        tool_metrics.record_upstream(current_tool.get(), response.num_bytes_downloaded)
+        scheduler.update(key, response.headers)
+        if response.status_code in TRANSIENT_STATUSES and method in IDEMPOTENT_METHODS and transient_attempts < retries:
+            print(f"{response.status_code} on {method} {url}, retrying", file=sys.stderr)
+            await asyncio.sleep(0.5 * 2 ** transient_attempts)
+            transient_attempts += 1
+            continue
+        delay = scheduler.retry_delay(key, response, rate_limit_attempts)
+        if delay is None or delay > scheduler.max_wait or rate_limit_attempts >= RATE_LIMIT_RETRIES:
+            return response
+        rate_limit_attempts += 1
+        print(f"Rate limited on {method} {url}, retrying in {delay:.0f}s", file=sys.stderr)
+
+async def run_github(fn, *args, write=False, **kwargs):
+    """
+    Run a blocking PyGithub call in a worker thread through the scheduler.
+    Methods of PyGithub objects are accounted to the token of the client
+    that created the object; anything else to the primary token.
+    """
+    await asyncio.to_thread(get_github_client)
+    owner = getattr(fn, '__self__', None)
+    pool = get_token_pool()
+    entry = pool.entry_for(owner.requester) if hasattr(owner, 'requester') else pool.primary
+    async with get_scheduler().slot(entry.label, write=write):
+        try:
+            return await asyncio.to_thread(fn, *args, **kwargs)
+        finally:
+            # PyGithub no expone el tamaño de las respuestas: solo se cuenta la llamada
+            tool_metrics.record_upstream(current_tool.get())
+            get_scheduler().update_from_requester(entry.label, entry.client.requester)
+
+async def github_get(path, params=None, revalidate=False):
+    """
+    GET a GitHub REST API path using conditional requests.
+    A 304 Not Modified answer is served from the response cache and does not
+    count against the rate limit. With GITHUB_DISK_CACHE enabled, responses
+    are also persisted so that a new process can revalidate them instead of
+    downloading them again. With GITHUB_CACHE_TTL set, responses validated
+    less than that many seconds ago are served without any request, unless
+    revalidate is set: callers that poll for a change must always ask GitHub.
+
+    Returns:
+        Tuple (body, links) where links maps Link header relations
+        ("next", "last", ...) to their URLs.
+    """
+    config = get_github_config()
+    url = path if path.startswith('http') else f"{config['apiUrl']}{path}"
+    if params:
+        url = f"{url}?{urlencode(sorted(params.items()))}"
+
+    cache = get_response_cache()
+    disk = get_disk_cache()
+    headers = {}
+    cached = cache.get(url)
+    if cached is None and disk is not None:
+        cached = disk.get(url)
+        if cached:
+            cache.put(url, cached)
+    if cached:
+        if not revalidate and time.monotonic() - cached.get('validated_at', float('-inf')) < config['cacheTtl']:
+            cache.record(hit=True)
+            return cached['body'], cached['links']
+        if cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    response = await github_request('GET', url, headers=headers)
+    if response.status_code == 304 and cached:
+        cache.record(hit=True)
+        cached['validated_at'] = time.monotonic()
+        return cached['body'], cached['links']
+
+    cache.record(hit=False)
+    if response.status_code != 200:
+        raise GitHubAPIError(response.status_code, response.text)
+
+    body = response.json()
+    links = {rel: link['url'] for rel, link in response.links.items()}
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if etag or last_modified:
+        entry = {
+            'etag': etag,
+            'last_modified': last_modified,
+            'body': body,
+            'links': links,
+            'validated_at': time.monotonic()
+        }
+        cache.put(url, entry)
+        if disk is not None:
+            disk.put(url, entry, response.text)
+    return body, links
+
+# Largest page size accepted by the GitHub REST API
+LIST_PER_PAGE = 100
+
+async def github_get_all(path, params=None):
+    """
+    GET every page of a paginated GitHub REST API list.
+    The first page gives the number of the last one (Link rel="last"), so the
+    remaining pages are fetched concurrently with at most GITHUB_PAGE_WORKERS
+    requests in flight. Items are returned in the original order.
+    """
+    params = {**(params or {}), "per_page": LIST_PER_PAGE}
+    items, links = await github_get(path, params)
+    items = list(items)
+
+    if 'last' in links:
+        last_page = int(parse_qs(urlparse(links['last']).query)['page'][0])
+        workers = asyncio.Semaphore(get_github_config()['pageWorkers'])
+
+        async def fetch_page(page):
+            async with workers:
+                body, _ = await github_get(path, {**params, "page": page})
+                return body
+
+        pages = await asyncio.gather(*(fetch_page(page) for page in range(2, last_page + 1)))
+        for body in pages:
+            items.extend(body)
+    else:
+        # Sin rel="last" solo queda seguir los enlaces uno a uno
+        while 'next' in links:
+            body, links = await github_get(links['next'])
+            items.extend(body)
+    return items
+
+def graphql_url():
+    """GraphQL endpoint of GITHUB_API_URL (https://api.github.com or <host>/api/v3)"""
+    api_url = get_github_config()['apiUrl'].rstrip('/')
+    if api_url.endswith('/v3'):
+        return f"{api_url[:-len('/v3')]}/graphql"
+    return f"{api_url}/graphql"
+
+async def github_graphql(query, variables=None):
+    """
+    Run a GraphQL query through the scheduler.
+    Queries are reads: they are not paced as writes and are accounted
+    against the graphql rate limit instead of the REST one.
+
+    Returns:
+        The data member of the response
+    """
+    body = {"query": query, "variables": variables or {}}
+    response = await github_request('POST', graphql_url(), json_body=body, write=False, resource='graphql')
+    if response.status_code != 200:
+        raise GitHubAPIError(response.status_code, response.text)
+    result = response.json()
+    if result.get('errors'):
+        raise GitHubAPIError(response.status_code, "; ".join(error.get('message', '') for error in result['errors']))
+    return result['data']
+
+# Page size used for list_commits. It is kept constant so that pages fetched
+# with different limits share the same cached URLs.
+COMMITS_PER_PAGE = 100
+
+def encode_cursor(state):
+    """Encode pagination state as an opaque continuation token"""
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(',', ':')).encode()).decode()
+
+def load_cursor(cursor):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def decode_cursor(cursor):
+    state = load_cursor(cursor)
+    try:
+        return {"params": dict(state["params"]), "page": int(state["page"]), "skip": int(state["skip"])}
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def isoformat(value):
+    """Normalize a GitHub API timestamp to the isoformat used by PyGithub"""
+    return datetime.fromisoformat(value).isoformat() if value else None
+
+# Formatos de salida de las herramientas de listado y campos que puede pedir `fields`
+LIST_FORMATS = ('objects', 'columns')
+REPOSITORY_LIST_FIELDS = ("name", "full_name", "private", "description", "url", "default_branch", "updated_at")
+PULL_REQUEST_LIST_FIELDS = ("number", "title", "url", "state", "head", "base", "author", "created_at")
+COMMIT_LIST_FIELDS = ("sha", "message", "author", "date", "url")
+
+def list_columns(available, fields=None, format='objects'):
+    """
+    Validate the output options of a list tool before calling the API.
+
+    Args:
+        available: Fields the tool returns by default, in order
+        fields: Fields to return, as a list or a comma-separated string
+        format: 'objects' or 'columns'
+
+    Returns:
+        The columns to return, in order
+    """
+    if format not in LIST_FORMATS:
+        raise ValueError(f"Unknown format '{format}', expected one of: {', '.join(LIST_FORMATS)}")
+    if not fields:
+        return list(available)
+    if isinstance(fields, str):
+        fields = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(available)}")
+    return list(fields)
+
+def shape_rows(rows, columns, format='objects'):
+    """
+    Project the rows of a list tool onto columns. The 'columns' format sends
+    the keys once: {"columns": [...], "rows": [[...], ...]}.
+    """
+    if format == 'columns':
+        return {"columns": columns, "rows": [[row[column] for column in columns] for row in rows]}
+    return [{column: row[column] for column in columns} for row in rows]
+
+def truncation_length(length):
+    """Validate a message_length option before calling the API; None keeps whole messages"""
+    if length is None:
+        return None
+    length = int(length)
+    if length < 1:
+        raise ValueError("message_length must be a positive integer")
+    return length
+
+def truncate(text, length):
+    """Cut text to length characters, marking the cut with '...'"""
+    if length is None or text is None or len(text) <= length:
+        return text
+    return text[:int(length)] + '...'
+
 # Initialize MCP server
 def init_github_client():
     """Initialize the GitHub client with proper error handling"""
@@ -83,15 +1305,214 @@ def init_github_client():
     if not token:
         raise ValueError("GITHUB_TOKEN environment variable is not set")
     
-    # Validate token before initializing Github client
-    is_valid, result = verify_token(token)
-    if not is_valid:
-        raise ValueError(f"Invalid GitHub token. Status code: {result}")
-    
-    print(f"Token valid. Authenticated as: {result.get('login')}", file=sys.stderr)
-    g = Github(auth=Auth.Token(token))
+    # Validate token before initializing Github client, reusing the
+    # background check started at startup
+    if config['verifyToken'] != 'off':
+        is_valid, result = start_token_check().result()
+        if not is_valid:
+            raise ValueError(f"Invalid GitHub token. Status code: {result}")
+        print(f"Token valid. Authenticated as: {result.get('login')}", file=sys.stderr)
+
+    pool = get_token_pool()
+    if len(pool.entries) > 1:
+        print(f"Token pool with {len(pool.entries)} credentials", file=sys.stderr)
+    g = pool.primary.client
+    return g
+
+def get_github_client():
+    """Return the shared PyGithub client, initializing it on first use"""
+    if g is None:
+        init_github_client()
     return g
 
+def run_in_thread(fn):
+    """Run a blocking tool in a worker thread so it does not stall the event loop"""
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    return wrapper
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers with the same key"""
+    def __init__(self):
+        self.calls = {}
+        self.executions = 0
+        self.shared = 0
+
+    async def do(self, key, fn):
+        task = self.calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self.calls[key] = task
+            task.add_done_callback(lambda _: self.calls.pop(key, None) if self.calls.get(key) is task else None)
+            self.executions += 1
+        else:
+            self.shared += 1
+        # shield: si un llamador se cancela, los demás siguen esperando el resultado
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {"executions": self.executions, "shared": self.shared, "in_flight": len(self.calls)}
+
+single_flight = SingleFlight()
+
+# Upper bounds, in seconds, of the buckets of the tool latency histograms
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+class ToolMetrics:
+    """
+    Calls, errors, latency histogram and upstream GitHub traffic of every
+    tool. Upstream requests are attributed through the current_tool context
+    variable, which asyncio tasks and worker threads inherit.
+    """
+    def __init__(self):
+        self._tools = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, name):
+        entry = self._tools.get(name)
+        if entry is None:
+            entry = self._tools[name] = {
+                "calls": 0,
+                "errors": 0,
+                "seconds": 0.0,
+                "max_seconds": 0.0,
+                "buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+                "upstream_requests": 0,
+                "upstream_bytes": 0
+            }
+        return entry
+
+    def record_call(self, name, seconds, error):
+        with self._lock:
+            entry = self._entry(name)
+            entry["calls"] += 1
+            entry["errors"] += bool(error)
+            entry["seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            entry["buckets"][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def record_upstream(self, name, size=0):
+        if name is None:
+            return
+        with self._lock:
+            entry = self._entry(name)
+            entry["upstream_requests"] += 1
+            entry["upstream_bytes"] += size
+
+    def snapshot(self):
+        with self._lock:
+            return {name: {**entry, "buckets": list(entry["buckets"])} for name, entry in self._tools.items()}
+
+    def stats(self):
+        """Summary per tool; percentiles are the upper bound of their histogram bucket"""
+        def quantile(entry, q):
+            rank, seen = q * entry["calls"], 0
+            for bound, count in zip(LATENCY_BUCKETS, entry["buckets"]):
+                seen += count
+                if seen >= rank:
+                    return round(min(bound, entry["max_seconds"]) * 1000, 1)
+            return round(entry["max_seconds"] * 1000, 1)
+
+        return {name: {
+            "calls": entry["calls"],
+            "errors": entry["errors"],
+            "mean_ms": round(entry["seconds"] / entry["calls"] * 1000, 1) if entry["calls"] else None,
+            "p50_ms": quantile(entry, 0.5) if entry["calls"] else None,
+            "p95_ms": quantile(entry, 0.95) if entry["calls"] else None,
+            "max_ms": round(entry["max_seconds"] * 1000, 1),
+            "upstream_requests": entry["upstream_requests"],
+            "upstream_bytes": entry["upstream_bytes"]
+        } for name, entry in sorted(self.snapshot().items())}
+
+tool_metrics = ToolMetrics()
+
+# cProfile solo admite un perfilador activo: se perfila una llamada a la vez
+profile_lock = threading.Lock()
+
+# GITHUB_PROFILE_SLOW_MS se consulta en cada llamada, así que se lee una sola vez
+profile_slow_ms = None
+
+def get_profile_slow_ms():
+    global profile_slow_ms
+    if profile_slow_ms is None:
+        profile_slow_ms = get_github_config()['profileSlowMs']
+    return profile_slow_ms
+
+def start_profile():
+    """
+    Start profiling a tool call if GITHUB_PROFILE_SLOW_MS is set and no other
+    call is being profiled. The profiler sees the event loop thread, so work
+    done in worker threads shows up as time waiting for them.
+    """
+    if not get_profile_slow_ms() or not profile_lock.acquire(blocking=False):
+        return None
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Otro perfilador (un depurador, por ejemplo) ya está activo
+        profile_lock.release()
+        return None
+    return profiler
+
+def finish_profile(profiler, name, seconds):
+    """Stop the profiler and keep its profile if the call took longer than GITHUB_PROFILE_SLOW_MS"""
+    profiler.disable()
+    profile_lock.release()
+    if seconds * 1000 < get_profile_slow_ms():
+        return
+    config = get_github_config()
+    import pstats
+    directory = Path(config['profileDir'] or Path(tempfile.gettempdir()) / 'mcp-github-profiles')
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.prof"
+    profiler.dump_stats(str(path))
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(10)
+    print(f"Slow call: {name} took {seconds * 1000:.0f} ms, profile saved to {path}", file=sys.stderr)
+    print(summary.getvalue(), file=sys.stderr)
+
+def coalesced(fn):
+    """
+    Coalesce concurrent calls of a read-only tool with the same arguments into
+    a single execution whose result every caller receives.
+    Mutating tools must never be coalesced.
+    """
+    signature = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = f"{fn.__name__}:{json.dumps(bound.arguments, sort_keys=True, default=str)}"
+        return await single_flight.do(key, lambda: fn(*args, **kwargs))
+    return wrapper
+
+def get_default_repository_full_name():
+    config = get_github_config()
+    return f"{config.get('username')}/{config.get('repository')}"
+
+def get_repo_with_pool(repository_full_name):
+    """
+    Fetch a repository with the first pool token that can access it and pin
+    the repository to that token.
+    """
+    from github import GithubException
+    pool = get_token_pool()
+    candidates = pool.candidates(repository_full_name, write=True)
+    for index, entry in enumerate(candidates):
+        try:
+            repo = entry.client.get_repo(repository_full_name)
+        except GithubException as e:
+            if e.status not in (403, 404) or index + 1 == len(candidates):
+                raise
+            continue
+        if index:
+            pool.pin(repository_full_name, entry)
+        return repo
+
 def get_repository(repository_full_name=None):
     """
     Get a GitHub repository.
@@ -99,43 +1520,60 @@ def get_repository(repository_full_name=None):
     Format for repository_full_name: "username/repository"
     """
     try:
-        global g
-        if g is None:
-            init_github_client()
-            
+        get_github_client()
+
         # Si no se proporciona un repositorio, usar el de la configuración por defecto
         if not repository_full_name:
-            config = get_github_config()
-            username = config.get('username')
-            repository = config.get('repository')
-            repository_full_name = f"{username}/{repository}"
+            repository_full_name = get_default_repository_full_name()
             
-        # Obtener el repositorio especificado
-        repo = g.get_repo(repository_full_name)
+        # Obtener el repositorio especificado, reutilizando el objeto en caché
+        cache = get_repository_cache()
+        key = repository_full_name.lower()
+        repo = cache.get(key)
+        cache.record(hit=repo is not None)
+        if repo is None:
+            repo = get_repo_with_pool(repository_full_name)
+            cache.put(key, repo)
         return repo, None
     except Exception as e:
         return None, str(e)
 
 @mcp.tool()
-def list_repositories():
+@coalesced
+async def list_repositories(fields=None, format="objects"):
+    """
+    List the repositories of the authenticated user.
+
+    Args:
+        fields: Fields to return, any of 'name', 'full_name', 'private',
+            'description', 'url', 'default_branch' and 'updated_at'
+            (default: 'name' and 'private').
+        format: 'objects' (a list of objects) or 'columns' (the keys once and
+            one array per repository).
+    """
     try:
-        global g
-        if g is None:
-            init_github_client()
-        user = g.get_user()
-        repos = user.get_repos()
-        repo_list = [{"name": repo.name, "private": repo.private} for repo in repos]
-        return {"result": repo_list}
+        columns = list_columns(REPOSITORY_LIST_FIELDS, fields or ["name", "private"], format)
+        repos = await github_get_all('/user/repos')
+        repo_list = [{
+            "name": repo["name"],
+            "full_name": repo.get("full_name"),
+            "private": repo["private"],
+            "description": repo.get("description"),
+            "url": repo.get("html_url"),
+            "default_branch": repo.get("default_branch"),
+            "updated_at": isoformat(repo.get("updated_at"))
+        } for repo in repos]
+        return {"result": shape_rows(repo_list, columns, format)}
     except Exception as e:
         return {"error": str(e)}
 
 @mcp.tool()
-def create_repository(repository_name, private=True):
+async def create_repository(repository_name, private=True):
     try:
-        global g
-        if g is None:
-            init_github_client()
-        repo = g.get_user().create_repo(repository_name, private=private)
+        client = await asyncio.to_thread(get_github_client)
+        repo = await run_github(client.get_user().create_repo, repository_name, private=private, write=True)
+        invalidate_repository(repo.full_name)
+        get_repository_cache().put(repo.full_name.lower(), repo)
         return {
             "result": {
                 "name": repo.name,
@@ -147,7 +1585,7 @@ def create_repository(repository_name, private=True):
         return {"error": str(e)}
 
 @mcp.tool()
-def delete_repository(repository_name=None, repository_full_name=None):
+async def delete_repository(repository_name=None, repository_full_name=None):
     """
     Delete a GitHub repository.
     
@@ -156,26 +1594,24 @@ def delete_repository(repository_name=None, repository_full_name=None):
         repository_full_name: Full name of the repository (username/repo)
     """
     try:
-        global g
-        if g is None:
-            init_github_client()
-            
         # Si se proporciona repository_full_name, usarlo directamente
         if repository_full_name:
-            repo, error = get_repository(repository_full_name)
+            repo, error = await run_github(get_repository, repository_full_name)
             if error:
                 return {"error": error}
-            repo.delete()
+            await run_github(repo.delete, write=True)
+            invalidate_repository(repository_full_name)
             return {"result": {"message": f"Repository {repository_full_name} deleted successfully"}}
         
         # Si no hay repository_full_name pero hay repository_name, usar el usuario por defecto
         elif repository_name:
             config = get_github_config()
             username = config.get('username')
-            repo, error = get_repository(f"{username}/{repository_name}")
+            repo, error = await run_github(get_repository, f"{username}/{repository_name}")
             if error:
                 return {"error": error}
-            repo.delete()
+            await run_github(repo.delete, write=True)
+            invalidate_repository(f"{username}/{repository_name}")
             return {"result": {"message": f"Repository {repository_name} deleted successfully"}}
         else:
             return {"error": "Either repository_name or repository_full_name must be provided"}
@@ -183,18 +1619,20 @@ def delete_repository(repository_name=None, repository_full_name=None):
         return {"error": str(e)}
 
 @mcp.tool()
-def create_pull_request(repository_full_name, head_branch, base_branch):
+async def create_pull_request(repository_full_name, head_branch, base_branch):
     try:
-        global g
-        if g is None:
-            init_github_client()
-        repo = g.get_repo(repository_full_name)
-        pull_request = repo.create_pull(
+        repo, error = await run_github(get_repository, repository_full_name)
+        if error:
+            return {"error": error}
+        pull_request = await run_github(
+            repo.create_pull,
             title="Create pull request",
             body="This is a pull request created by the script",
             head=head_branch,
             base=base_branch,
+            write=True
         )
+        drop_cached_responses(repository_full_name, "pull_request")
         return {
             "result": {
                 "number": pull_request.number,
@@ -206,71 +1644,410 @@ def create_pull_request(repository_full_name, head_branch, base_branch):
         return {"error": str(e)}
 
 @mcp.tool()
-def list_pull_requests(repository_full_name):
+@coalesced
+async def list_pull_requests(repository_full_name, fields=None, format="objects"):
+    """
+    List the open pull requests of a repository.
+
+    Args:
+        repository_full_name: Full name of the repository in format 'username/repository'
+        fields: Fields to return, any of 'number', 'title', 'url', 'state',
+            'head', 'base', 'author' and 'created_at' (default: 'number',
+            'title', 'url' and 'state').
+        format: 'objects' (a list of objects) or 'columns' (the keys once and
+            one array per pull request).
+    """
+    try:
+        columns = list_columns(PULL_REQUEST_LIST_FIELDS, fields or ["number", "title", "url", "state"], format)
+        pull_requests = await github_get_all(f"/repos/{repository_full_name}/pulls", {"state": "open"})
+        pr_list = [{
+            "number": pr["number"],
+            "title": pr["title"],
+            "url": pr["html_url"],
+            "state": pr["state"],
+            "head": pr["head"]["ref"],
+            "base": pr["base"]["ref"],
+            "author": (pr.get("user") or {}).get("login"),
+            "created_at": isoformat(pr.get("created_at"))
+        } for pr in pull_requests]
+        return {"result": shape_rows(pr_list, columns, format)}
+    except Exception as e:
+        return {"error": str(e)}
+
+# Espera entre consultas de mergeability: empieza en GITHUB_MERGE_POLL_INTERVAL y crece
+# un 50% en cada consulta hasta MERGE_POLL_MAX_INTERVAL
+MERGE_POLL_BACKOFF = 1.5
+MERGE_POLL_MAX_INTERVAL = 8
+
+async def wait_for_mergeability(repository_full_name, number, deadline, pull=None, delay=None, interval=None):
+    """
+    Poll a pull request until GitHub has computed whether it can be merged.
+    GitHub computes it in the background and answers mergeable=null in the
+    meantime. The first poll is immediate and the next ones back off
+    exponentially; while nothing changes they are answered with a 304 that
+    does not count against the rate limit.
+
+    Args:
+        pull: The pull request as just fetched, if any; polling then starts
+            with a wait instead of a request.
+        delay: First wait (default: interval).
+        interval: Wait after the first one; it grows by MERGE_POLL_BACKOFF
+            (default GITHUB_MERGE_POLL_INTERVAL).
+
+    Returns:
+        Tuple (pull, pending_at): the pull request as last seen, whose
+        mergeable is still None if the deadline passed first, and the
+        time.monotonic() of the last poll answered with mergeable=null, or
+        None if there was none.
+    """
+    interval = interval or get_github_config()['mergePollInterval']
+    wait = delay or interval
+    pending_at = None
+    while True:
+        if pull is None:
+            requested_at = time.monotonic()
+            pull, _ = await github_get(f"/repos/{repository_full_name}/pulls/{number}", revalidate=True)
+            if pull["mergeable"] is None:
+                pending_at = requested_at
+        remaining = deadline - time.monotonic()
+        if pull["state"] != "open" or pull["mergeable"] is not None or remaining <= 0:
+            return pull, pending_at
+        await asyncio.sleep(min(wait, remaining))
+        wait, interval = interval, min(interval * MERGE_POLL_BACKOFF, MERGE_POLL_MAX_INTERVAL)
+        pull = None
+
+async def merge_checked(repository_full_name, pull, merge_method):
+    """Merge a pull request whose mergeability was just checked, at the head SHA that was checked"""
+    number = pull["number"]
+    if pull.get("merged"):
+        raise ValueError(f"Pull request #{number} is already merged")
+    if pull["state"] != "open":
+        raise ValueError(f"Pull request #{number} is {pull['state']}")
+    if pull["mergeable"] is None:
+        raise TimeoutError(f"GitHub did not compute the mergeability of pull request #{number} in time")
+    if not pull["mergeable"]:
+        raise ValueError(f"Pull request #{number} is not mergeable ({pull.get('mergeable_state')})")
+
+    # Con el sha, GitHub rechaza el merge si la rama cambió desde la comprobación
+    body = {"merge_method": merge_method, "sha": pull["head"]["sha"]}
+    response = await github_request('PUT', f"/repos/{repository_full_name}/pulls/{number}/merge", json_body=body)
+    if response.status_code != 200:
+        raise GitHubAPIError(response.status_code, response.text)
+    return {"message": f"Pull request #{number} merged successfully", "sha": response.json()["sha"]}
+
+async def merge_when_ready(repository_full_name, number, merge_method, timeout):
+    """Wait up to timeout seconds until a pull request is mergeable and merge the head SHA that was checked"""
+    pull, _ = await wait_for_mergeability(repository_full_name, number, time.monotonic() + timeout)
+    return await merge_checked(repository_full_name, pull, merge_method)
+
+async def pull_changed(repository_full_name, pull):
+    """Whether a pull request changed since it was checked: new head, or mergeability being recomputed"""
+    current, _ = await github_get(f"/repos/{repository_full_name}/pulls/{pull['number']}", revalidate=True)
+    return (current["head"]["sha"] != pull["head"]["sha"] or current["mergeable"] is None
+            or current.get("mergeable_state") != pull.get("mergeable_state"))
+
+def merge_order(pulls):
+    """
+    Order pull requests for merging. A pull request based on the head branch
+    of another one in the batch (a stacked pull request) is merged into that
+    branch first, so its parent then carries it to the final base; the rest
+    go oldest first.
+    """
+    pulls = sorted(pulls, key=lambda pull: pull["number"])
+    order, visited = [], set()
+
+    def visit(pull):
+        if pull["number"] in visited:
+            return
+        visited.add(pull["number"])
+        for child in pulls:
+            if child["base"]["ref"] == pull["head"]["ref"]:
+                visit(child)
+        order.append(pull)
+
+    for pull in pulls:
+        visit(pull)
+    return order
+
+@mcp.tool()
+async def merge_pull_request(repository_full_name, pull_request_number):
+    """
+    Merge a pull request, waiting up to GITHUB_MERGE_TIMEOUT seconds for
+    GitHub to compute whether it is mergeable.
+
+    Args:
+        repository_full_name: Full name of the repository in format 'username/repository'
+        pull_request_number: Number of the pull request to merge
+    """
     try:
-        global g
-        if g is None:
-            init_github_client()
-        repo = g.get_repo(repository_full_name)
-        pull_requests = repo.get_pulls(state='open')
-        pr_list = [{
-            "number": pr.number,
-            "title": pr.title,
-            "url": pr.html_url,
-            "state": pr.state
-        } for pr in pull_requests]
-        return {"result": pr_list}
+        if not repository_full_name:
+            repository_full_name = get_default_repository_full_name()
+        timeout = get_github_config()['mergeTimeout']
+        return {"result": await merge_when_ready(repository_full_name, int(pull_request_number), "merge", timeout)}
     except Exception as e:
         return {"error": str(e)}
 
 @mcp.tool()
-def merge_pull_request(repository_full_name, pull_request_number):
+async def merge_pull_requests(repository_full_name, pull_request_numbers, merge_method="merge", timeout=None):
+    """
+    Merge several pull requests of a repository as a queue, within one deadline.
+    Every pull request is fetched concurrently, which makes GitHub start
+    computing its mergeability, and each one is merged as soon as it is
+    ready, stacked pull requests before the pull request they are based on.
+    A merge moves its base branch, which makes GitHub recompute the pull
+    requests on that base; only those are checked again, and since the next
+    merge would make the rest stale once more, only the next one of each base
+    is polled. Pull requests on different bases are polled concurrently.
+
+    Args:
+        repository_full_name: Full name of the repository in format 'username/repository'
+        pull_request_numbers: List of pull request numbers
+        merge_method: 'merge', 'squash' or 'rebase'
+        timeout: Seconds to wait for the whole queue (default GITHUB_MERGE_TIMEOUT)
+
+    Returns:
+        One entry per pull request, in the order they were merged, with its
+        result or its own error
+    """
     try:
-        global g
-        if g is None:
-            init_github_client()
-        repo = g.get_repo(repository_full_name)
-        pull_request = repo.get_pull(pull_request_number)
-        if pull_request.is_mergeable():
-            result = pull_request.merge()
-            return {
-                "result": {
-                    "message": f"Pull request #{pull_request_number} merged successfully",
-                    "sha": result.sha
-                }
-            }
-        else:
-            return {"error": f"Pull request #{pull_request_number} is not mergeable"}
+        if not repository_full_name:
+            repository_full_name = get_default_repository_full_name()
+        numbers = list(dict.fromkeys(int(number) for number in pull_request_numbers))
+        deadline = time.monotonic() + float(timeout or get_github_config()['mergeTimeout'])
+
+        # Todas a la vez: GitHub empieza a calcular la mergeability de cada una
+        fetched = await asyncio.gather(
+            *(github_get(f"/repos/{repository_full_name}/pulls/{number}", revalidate=True) for number in numbers),
+            return_exceptions=True
+        )
+        results, latest = [], {}
+        for number, pull in zip(numbers, fetched):
+            if isinstance(pull, Exception):
+                results.append({"number": number, "error": str(pull)})
+            else:
+                latest[number] = pull[0]
+        order = [pull["number"] for pull in merge_order(latest.values())]
+        # PRs cuya mergeability hay que (volver a) consultar, con el momento en que quedaron obsoletas
+        # por un merge (None si la respuesta que se tiene es reciente y la primera consulta puede esperar)
+        stale = {number: None for number, pull in latest.items() if pull["state"] == "open" and pull["mergeable"] is None}
+        polls = {}
+        # Cota inferior de lo que tarda GitHub en recalcular tras un merge: la última consulta que aún
+        # respondió null. Tras la consulta inmediata se espera hasta ahí y luego se consulta a pasos cortos
+        recompute = None
+
+        def finish(number, **outcome):
+            del latest[number]
+            stale.pop(number, None)
+            results.append({"number": number, **outcome})
+
+        def schedule():
+            """Poll the first stale pull request of every base that is not being polled yet"""
+            polled_bases = {latest[number]["base"]["ref"] for number in polls}
+            for number in order:
+                if number in stale and number not in polls:
+                    base = latest[number]["base"]["ref"]
+                    if base not in polled_bases:
+                        polled_bases.add(base)
+                        # Tras un merge se consulta enseguida, por si GitHub ya lo recalculó
+                        pull = latest[number] if stale[number] is None else None
+                        learned = recompute if stale[number] is not None else None
+                        polls[number] = asyncio.ensure_future(wait_for_mergeability(
+                            repository_full_name, number, deadline, pull, learned, learned and learned / 10))
+
+        try:
+            while latest:
+                schedule()
+                if polls:
+                    done, _ = await asyncio.wait(polls.values(), return_when=asyncio.FIRST_COMPLETED)
+                    for number, task in list(polls.items()):
+                        if task not in done:
+                            continue
+                        del polls[number]
+                        if task.exception():
+                            finish(number, error=str(task.exception()))
+                            continue
+                        latest[number], pending_at = task.result()
+                        staled_at = stale.pop(number)
+                        if staled_at is not None and pending_at is not None and latest[number]["mergeable"] is not None:
+                            pending = pending_at - staled_at
+                            # Si ya respondió tras la espera aprendida, la cota no dice nada: solo se acorta un poco
+                            recompute = recompute * 0.9 if recompute and pending < recompute / 2 else pending
+
+                # En orden de merge, las comprobadas que no esperan a una PR apilada sobre ellas
+                merged_any = False
+                for number in order:
+                    pull = latest.get(number)
+                    if pull is None or number in stale or number in polls:
+                        continue
+                    if any(other["base"]["ref"] == pull["head"]["ref"] for other in latest.values()):
+                        continue
+                    try:
+                        result = await merge_checked(repository_full_name, pull, merge_method)
+                    except GitHubAPIError as e:
+                        # 409: la rama cambió desde la comprobación. 405 también lo puede indicar, pero
+                        # solo si la PR cambió; si no, es una regla de protección o un método no permitido
+                        if e.status in (405, 409) and time.monotonic() < deadline and (
+                                e.status == 409 or await pull_changed(repository_full_name, pull)):
+                            stale[number] = time.monotonic()
+                        else:
+                            finish(number, error=str(e))
+                        continue
+                    except Exception as e:
+                        finish(number, error=str(e))
+                        continue
+                    finish(number, result=result)
+                    merged_any = True
+                    # El merge mueve la rama base: cambian las PRs sobre esa base y la PR cuya cabeza es esa rama
+                    base, merged_at = pull["base"]["ref"], time.monotonic()
+                    for other_number, other in latest.items():
+                        if other["base"]["ref"] == base or other["head"]["ref"] == base:
+                            stale[other_number] = merged_at
+
+                if not polls and not stale and not merged_any and latest:
+                    # Solo quedan PRs que esperan a otras apiladas que ya no se pueden mergear
+                    for number in list(latest):
+                        finish(number, error=f"Pull request #{number} waits for a stacked pull request that was not merged")
+        finally:
+            for task in polls.values():
+                task.cancel()
+        return {"result": results}
     except Exception as e:
         return {"error": str(e)}
 
 @mcp.tool()
-def list_commits(repository_full_name, branch="master"):
+@coalesced
+async def list_commits(repository_full_name, branch="master", limit=100, since=None, until=None, path=None, author=None,
+                       cursor=None, fields=None, format="objects", message_length=None):
+    """
+    List the commits of a branch, newest first, one bounded page at a time.
+    With GITHUB_MIRROR_DIR set, commits are read from a local mirror of the
+    repository instead of the API.
+
+    Args:
+        repository_full_name: Full name of the repository in format 'username/repository'
+        branch: Branch, tag or SHA to start listing from.
+        limit: Maximum number of commits to return.
+        since: Only commits after this ISO 8601 date.
+        until: Only commits before this ISO 8601 date.
+        path: Only commits touching this file path.
+        author: Only commits by this author (GitHub login or email; a name or
+            email pattern in mirror mode).
+        cursor: next_cursor value returned by a previous call. It carries the
+            original filters, so the other filter arguments are ignored.
+        fields: Fields to return, any of 'sha', 'message', 'author', 'date'
+            and 'url' (default: all of them).
+        format: 'objects' (a list of objects) or 'columns' (the keys once and
+            one array per commit).
+        message_length: Cut messages to this many characters.
+
+    Returns:
+        The commits and next_cursor, which is None once the history is exhausted.
+    """
     try:
-        global g
-        if g is None:
-            init_github_client()
-        repo = g.get_repo(repository_full_name)
-        commits = repo.get_commits(sha=branch)
+        limit = int(limit)
+        if limit < 1:
+            return {"error": "limit must be a positive integer"}
+        columns = list_columns(COMMIT_LIST_FIELDS, fields, format)
+        message_length = truncation_length(message_length)
+
+        def respond(commits, next_cursor):
+            if message_length is not None and "message" in columns:
+                commits = [{**commit, "message": truncate(commit["message"], message_length)} for commit in commits]
+            return {"result": shape_rows(commits, columns, format), "next_cursor": next_cursor}
+
+        if cursor:
+            state = decode_cursor(cursor)
+        else:
+            params = {"sha": branch, "per_page": COMMITS_PER_PAGE}
+            if since:
+                params["since"] = since
+            if until:
+                params["until"] = until
+            if path:
+                params["path"] = path
+            if author:
+                params["author"] = author
+            state = {"params": params, "page": 1, "skip": 0}
+
+        mirror = get_mirror_store()
+        if mirror:
+            try:
+                return respond(*await list_commits_from_mirror(mirror, repository_full_name, state, limit))
+            except Exception as e:
+                print(f"Mirror of {repository_full_name} unavailable, using the API: {e}", file=sys.stderr)
+
+        commits = []
+        next_state = None
+        page, skip = state["page"], state["skip"]
+        # Solo se piden las páginas necesarias para completar el límite
+        while True:
+            body, links = await github_get(f"/repos/{repository_full_name}/commits", {**state["params"], "page": page})
+            items = body[skip:]
+            wanted = limit - len(commits)
+            commits.extend(items[:wanted])
+            if len(items) > wanted:
+                next_state = {**state, "page": page, "skip": skip + wanted}
+                break
+            if 'next' not in links:
+                break
+            page, skip = page + 1, 0
+            if len(commits) >= limit:
+                next_state = {**state, "page": page, "skip": 0}
+                break
+        if next_state and commits:
+            next_state = pin_history(next_state, state, commits[0]["sha"])
+
         commit_list = [{
-            "sha": commit.sha,
-            "message": commit.commit.message,
-            "author": commit.commit.author.name,
-            "date": commit.commit.author.date.isoformat(),
-            "url": commit.html_url
+            "sha": commit["sha"],
+            "message": commit["commit"]["message"],
+            "author": commit["commit"]["author"]["name"],
+            "date": isoformat(commit["commit"]["author"]["date"]),
+            "url": commit["html_url"]
         } for commit in commits]
-        return {"result": commit_list}
+        return respond(commit_list, encode_cursor(next_state) if next_state else None)
     except Exception as e:
         return {"error": str(e)}
 
+async def list_commits_from_mirror(mirror, repository_full_name, state, limit):
+    """
+    list_commits answered from the local mirror. Cursors keep the REST
+    page/skip form, so they stay valid if the mirror becomes unavailable.
+
+    Returns:
+        Tuple (commits, next_cursor)
+    """
+    params = state["params"]
+    per_page = params["per_page"]
+    offset = (state["page"] - 1) * per_page + state["skip"]
+    # Un commit de más indica si queda historia por listar
+    commits = await mirror.commits(
+        repository_full_name, params["sha"], offset, limit + 1,
+        since=params.get("since"), until=params.get("until"),
+        author=params.get("author"), path=params.get("path")
+    )
+    next_state = None
+    if len(commits) > limit:
+        offset += limit
+        next_state = pin_history({**state, "page": offset // per_page + 1, "skip": offset % per_page}, state, commits[0]["sha"])
+    return commits[:limit], encode_cursor(next_state) if next_state else None
+
+def pin_history(next_state, state, newest_sha):
+    """
+    On the first page of a walk, make the cursor continue from the newest
+    commit listed instead of the branch name. Commits pushed between calls
+    would otherwise shift the page/skip offsets and repeat or skip commits.
+    """
+    if state["page"] != 1 or state["skip"] != 0:
+        return next_state
+    return {**next_state, "params": {**next_state["params"], "sha": newest_sha}}
+
 @mcp.tool()
-def create_issue(repository_full_name, title, body):
+async def create_issue(repository_full_name, title, body):
     try:
-        global g
-        if g is None:
-            init_github_client()
-        repo = g.get_repo(repository_full_name)
-        issue = repo.create_issue(title=title, body=body)
+        repo, error = await run_github(get_repository, repository_full_name)
+        if error:
+            return {"error": error}
+        issue = await run_github(repo.create_issue, title=title, body=body, write=True)
         return {
             "result": {
                 "number": issue.number,
@@ -282,39 +2059,48 @@ def create_issue(repository_full_name, title, body):
         return {"error": str(e)}
 
 @mcp.tool()
-def list_branches(repository_full_name):
+@coalesced
+async def list_branches(repository_full_name, fields=None, format="objects"):
+    """
+    List the branches of a repository.
+
+    Args:
+        repository_full_name: Full name of the repository in format 'username/repository'
+        fields: Fields to return; branches only have 'name'.
+        format: 'objects' (a list of objects) or 'columns' (the keys once and
+            one array per branch).
+    """
     try:
-        global g
-        if g is None:
-            init_github_client()
-        repo = g.get_repo(repository_full_name)
-        branches = [{"name": branch.name} for branch in repo.get_branches()]
-        return {"result": branches}
+        columns = list_columns(["name"], fields, format)
+        mirror = get_mirror_store()
+        if mirror:
+            try:
+                return {"result": shape_rows(await mirror.branches(repository_full_name), columns, format)}
+            except Exception as e:
+                print(f"Mirror of {repository_full_name} unavailable, using the API: {e}", file=sys.stderr)
+        branches = [{"name": branch["name"]} for branch in await github_get_all(f"/repos/{repository_full_name}/branches")]
+        return {"result": shape_rows(branches, columns, format)}
     except Exception as e:
         return {"error": str(e)}
 
 @mcp.tool()
-def create_branch(repository_full_name, branch_name, source_branch="master"):
+async def create_branch(repository_full_name, branch_name, source_branch="master"):
     try:
-        global g
-        if g is None:
-            init_github_client()
-        repo = g.get_repo(repository_full_name)
-        source = repo.get_branch(source_branch)
-        repo.create_git_ref(ref=f"refs/heads/{branch_name}", sha=source.commit.sha)
+        repo, error = await run_github(get_repository, repository_full_name)
+        if error:
+            return {"error": error}
+        source = await run_github(repo.get_branch, source_branch)
+        await run_github(repo.create_git_ref, ref=f"refs/heads/{branch_name}", sha=source.commit.sha, write=True)
+        drop_cached_responses(repository_full_name, "create")
         return {"result": {"message": f"Branch {branch_name} created from {source_branch}"}}
     except Exception as e:
         return {"error": str(e)}
 
 @mcp.tool("delete_branch")
-def force_delete_branch(repository_full_name, branch_name, token):
+async def force_delete_branch(repository_full_name, branch_name, token):
     try:
-        url = f"https://api.github.com/repos/{repository_full_name}/git/refs/heads/{branch_name}"
-        headers = {
-            "Authorization": f"token {token}",
-            "Accept": "application/vnd.github.v3+json"
-        }
-        response = requests.delete(url, headers=headers)
+        url = f"/repos/{repository_full_name}/git/refs/heads/{branch_name}"
+        response = await github_request('DELETE', url, token=token)
         if response.status_code == 204:
             return {"result": {"message": f"Branch {branch_name} deleted via REST API"}}
         else:
@@ -323,7 +2109,8 @@ def force_delete_branch(repository_full_name, branch_name, token):
         return {"error": str(e)}
 
 @mcp.tool()
-def get_repository_info(repository_full_name):
+@coalesced
+async def get_repository_info(repository_full_name):
     """
     Get information about a specific GitHub repository.
     
@@ -334,69 +2121,647 @@ def get_repository_info(repository_full_name):
         Information about the repository including name, owner, description, etc.
     """
     try:
-        repo, error = get_repository(repository_full_name)
-        if error:
-            return {"error": error}
-            
+        if not repository_full_name:
+            repository_full_name = get_default_repository_full_name()
+        repo, _ = await github_get(f"/repos/{repository_full_name}")
+
         return {
             "result": {
-                "name": repo.name,
-                "full_name": repo.full_name,
-                "owner": repo.owner.login,
-                "description": repo.description,
-                "html_url": repo.html_url,
-                "default_branch": repo.default_branch,
-                "private": repo.private,
-                "created_at": repo.created_at.isoformat() if repo.created_at else None,
-                "updated_at": repo.updated_at.isoformat() if repo.updated_at else None,
-                "stars": repo.stargazers_count,
-                "forks": repo.forks_count,
-                "language": repo.language
+                "name": repo["name"],
+                "full_name": repo["full_name"],
+                "owner": repo["owner"]["login"],
+                "description": repo["description"],
+                "html_url": repo["html_url"],
+                "default_branch": repo["default_branch"],
+                "private": repo["private"],
+                "created_at": isoformat(repo["created_at"]),
+                "updated_at": isoformat(repo["updated_at"]),
+                "stars": repo["stargazers_count"],
+                "forks": repo["forks_count"],
+                "language": repo["language"]
             }
         }
     except Exception as e:
         return {"error": str(e)}
 
-def set_remote_with_token(repo_path, token, usuario, repo_name):
-    repo = Repo(repo_path)
-    # Si tenemos token, la URL se construye solo con el token
-    if token:
-        remote_url = f"https://{token}@github.com/{usuario}/{repo_name}.git"
-    else:
-        remote_url = f"https://github.com/{usuario}/{repo_name}.git"
-        
+async def run_batch(items, fn):
+    """
+    Run fn(item) for every item with at most GITHUB_BATCH_WORKERS in flight.
+
+    Returns:
+        One {"item", "result"} or {"item", "error"} entry per item, in order
+    """
+    workers = asyncio.Semaphore(get_github_config()['batchWorkers'])
+
+    async def run(item):
+        async with workers:
+            try:
+                return {"item": item, "result": await fn(item)}
+            except Exception as e:
+                return {"item": item, "error": str(e)}
+
+    return await asyncio.gather(*(run(item) for item in items))
+
+def batch_branch_name(item):
+    """branch_name of a create_branches/delete_branches item, with a readable error if it is missing"""
+    if not isinstance(item, dict):
+        raise ValueError(f"Expected an object with 'repository_full_name' and 'branch_name', got {item!r}")
+    if not item.get("branch_name") or not isinstance(item["branch_name"], str):
+        raise ValueError("branch_name is required")
+    return item["branch_name"]
+
+@mcp.tool()
+async def create_branches(branches):
+    """
+    Create several branches, possibly in different repositories, in one call.
+    The SHA of every (repository, source branch) pair is resolved only once.
+
+    Args:
+        branches: List of objects with 'repository_full_name', 'branch_name'
+            and optionally 'source_branch' (default 'master')
+
+    Returns:
+        One entry per branch with its result or its own error
+    """
+    try:
+        sources = {}
+
+        def resolve(repository_full_name, source_branch):
+            # Una sola petición por rama origen, compartida por todas las ramas nuevas
+            key = (repository_full_name, source_branch)
+            if key not in sources:
+                sources[key] = asyncio.ensure_future(
+                    github_get(f"/repos/{repository_full_name}/git/ref/heads/{source_branch}"))
+            return sources[key]
+
+        async def create(item):
+            branch_name = batch_branch_name(item)
+            repository_full_name = item.get("repository_full_name") or get_default_repository_full_name()
+            source_branch = item.get("source_branch") or "master"
+            ref, _ = await resolve(repository_full_name, source_branch)
+            body = {"ref": f"refs/heads/{branch_name}", "sha": ref["object"]["sha"]}
+            response = await github_request('POST', f"/repos/{repository_full_name}/git/refs", json_body=body)
+            if response.status_code != 201:
+                raise GitHubAPIError(response.status_code, response.text)
+            return {"message": f"Branch {branch_name} created from {source_branch}", "sha": body["sha"]}
+
+        return {"result": await run_batch(branches, create)}
+    except Exception as e:
+        return {"error": str(e)}
+
+@mcp.tool()
+async def delete_branches(branches):
+    """
+    Delete several branches, possibly in different repositories, in one call.
+
+    Args:
+        branches: List of objects with 'repository_full_name' and 'branch_name'
+
+    Returns:
+        One entry per branch with its result or its own error
+    """
+    try:
+        async def delete(item):
+            branch_name = batch_branch_name(item)
+            repository_full_name = item.get("repository_full_name") or get_default_repository_full_name()
+            url = f"/repos/{repository_full_name}/git/refs/heads/{branch_name}"
+            response = await github_request('DELETE', url)
+            if response.status_code != 204:
+                raise GitHubAPIError(response.status_code, response.text)
+            return {"message": f"Branch {branch_name} deleted"}
+
+        return {"result": await run_batch(branches, delete)}
+    except Exception as e:
+        return {"error": str(e)}
+
+@mcp.tool()
+async def get_repositories_info(repository_full_names):
+    """
+    Get information about several GitHub repositories in one call.
+
+    Args:
+        repository_full_names: List of repository names in format 'username/repository'
+
+    Returns:
+        One entry per repository with the same information as get_repository_info
+    """
+    try:
+        async def info(repository_full_name):
+            result = await get_repository_info(repository_full_name)
+            if "error" in result:
+                raise Exception(result["error"])
+            return result["result"]
+
+        return {"result": await run_batch(repository_full_names, info)}
+    except Exception as e:
+        return {"error": str(e)}
+
+# Secciones de get_repository_overview: conexión GraphQL y campos de cada nodo
+OVERVIEW_SECTIONS = {
+    "branches": (
+        'refs(refPrefix: "refs/heads/", first: $first, after: $branchesCursor)',
+        'name target { oid }'
+    ),
+    "pull_requests": (
+        'pullRequests(states: OPEN, first: $first, after: $pull_requestsCursor, orderBy: {field: CREATED_AT, direction: DESC})',
+        'number title url state headRefName baseRefName author { login } createdAt'
+    ),
+    "commits": (
+        'history(first: $first, after: $commitsCursor)',
+        'oid message url author { name date }'
+    ),
+}
+
+OVERVIEW_FIELDS = """
+    name nameWithOwner owner { login } description url isPrivate createdAt updatedAt
+    stargazerCount forkCount primaryLanguage { name } defaultBranchRef { name }
+"""
+
+def build_overview_query(sections):
+    """GraphQL query selecting the repository fields plus one page of every section"""
+    variables = ["$owner: String!", "$name: String!", "$first: Int!"]
+    selections = [OVERVIEW_FIELDS]
+    for section in sections:
+        connection, nodes = OVERVIEW_SECTIONS[section]
+        variables.append(f"${section}Cursor: String")
+        selection = f"{connection} {{ pageInfo {{ hasNextPage endCursor }} nodes {{ {nodes} }} }}"
+        if section == "commits":
+            # El historial cuelga del commit al que apunta la rama
+            variables.append("$commitsRef: String!")
+            selection = f"commits: object(expression: $commitsRef) {{ ... on Commit {{ {selection} }} }}"
+        else:
+            selection = f"{section}: {selection}"
+        selections.append(selection)
+    return f"query({', '.join(variables)}) {{ repository(owner: $owner, name: $name) {{ {' '.join(selections)} }} }}"
+
+def overview_node(section, node):
+    if section == "branches":
+        return {"name": node["name"], "sha": (node["target"] or {}).get("oid")}
+    if section == "pull_requests":
+        return {
+            "number": node["number"],
+            "title": node["title"],
+            "url": node["url"],
+            "state": node["state"].lower(),
+            "head": node["headRefName"],
+            "base": node["baseRefName"],
+            "author": (node["author"] or {}).get("login"),
+            "created_at": isoformat(node["createdAt"])
+        }
+    return {
+        "sha": node["oid"],
+        "message": node["message"],
+        "author": node["author"]["name"],
+        "date": isoformat(node["author"]["date"]),
+        "url": node["url"]
+    }
+
+def decode_overview_cursor(cursor, repository_full_name):
+    """
+    Decode a get_repository_overview cursor and check that it was returned
+    for the same repository.
+
+    Returns:
+        Tuple (cursors, limit, branch)
+    """
+    try:
+        state = load_cursor(cursor)
+        repository = state["repository"]
+        cursors = {section: str(after) for section, after in dict(state["cursors"]).items()}
+        limit, branch = int(state["limit"]), state["branch"]
+        if not isinstance(repository, str) or not 1 <= limit <= 100 or not isinstance(branch, (str, type(None))):
+            raise ValueError
+    except Exception:
+        raise ValueError("Invalid cursor: pass back the next_cursor of a previous get_repository_overview call unchanged")
+    if repository.lower() != repository_full_name.lower():
+        raise ValueError(f"This cursor was returned for {repository}, not for {repository_full_name}")
+    return cursors, limit, branch
+
+@mcp.tool()
+@coalesced
+async def get_repository_overview(repository_full_name, sections=None, limit=20, branch=None, cursor=None):
+    """
+    Get the repository information together with its branches, open pull
+    requests and recent commits in a single GraphQL request.
+
+    Args:
+        repository_full_name: Full name of the repository in format 'username/repository'
+        sections: Sections to include, any of 'branches', 'pull_requests' and
+            'commits' (default: all of them).
+        limit: Maximum number of items per section (1-100).
+        branch: Branch whose commits are listed (default: the default branch).
+        cursor: next_cursor value returned by a previous call. Only the
+            sections that have more items are fetched again.
+
+    Returns:
+        The repository information with one list per section, and next_cursor,
+        which is None once every section is exhausted.
+    """
+    try:
+        if not repository_full_name:
+            repository_full_name = get_default_repository_full_name()
+        limit = int(limit)
+        if not 1 <= limit <= 100:
+            return {"error": "limit must be between 1 and 100"}
+
+        cursors = {}
+        if cursor:
+            cursors, limit, branch = decode_overview_cursor(cursor, repository_full_name)
+            sections = list(cursors)
+        elif sections is None:
+            sections = list(OVERVIEW_SECTIONS)
+        unknown = [section for section in sections if section not in OVERVIEW_SECTIONS]
+        if unknown:
+            return {"error": f"Unknown sections: {', '.join(unknown)}"}
+
+        owner, name = repository_full_name.split('/', 1)
+        variables = {"owner": owner, "name": name, "first": limit}
+        for section in sections:
+            variables[f"{section}Cursor"] = cursors.get(section)
+        if "commits" in sections:
+            variables["commitsRef"] = branch or "HEAD"
+        repo = (await github_graphql(build_overview_query(sections), variables))["repository"]
+
+        result = {
+            "name": repo["name"],
+            "full_name": repo["nameWithOwner"],
+            "owner": repo["owner"]["login"],
+            "description": repo["description"],
+            "html_url": repo["url"],
+            "default_branch": (repo["defaultBranchRef"] or {}).get("name"),
+            "private": repo["isPrivate"],
+            "created_at": isoformat(repo["createdAt"]),
+            "updated_at": isoformat(repo["updatedAt"]),
+            "stars": repo["stargazerCount"],
+            "forks": repo["forkCount"],
+            "language": (repo["primaryLanguage"] or {}).get("name")
+        }
+        next_cursors = {}
+        for section in sections:
+            connection = repo[section]
+            if section == "commits":
+                connection = (connection or {}).get("history")
+            if not connection:
+                result[section] = []
+                continue
+            result[section] = [overview_node(section, node) for node in connection["nodes"]]
+            if connection["pageInfo"]["hasNextPage"]:
+                next_cursors[section] = connection["pageInfo"]["endCursor"]
+
+        next_state = {"repository": repository_full_name, "cursors": next_cursors, "limit": limit, "branch": branch}
+        return {
+            "result": result,
+            "next_cursor": encode_cursor(next_state) if next_cursors else None
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+def process_stats():
+    """Peak resident memory and CPU time of the server process; None where resource is unavailable"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    # ru_maxrss viene en KiB en Linux y en bytes en macOS
+    peak = usage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+    return {"peak_rss_mb": round(peak / 2 ** 20, 1), "cpu_seconds": round(usage.ru_utime + usage.ru_stime, 2)}
+
+@mcp.tool()
+async def server_stats():
+    """
+    Get runtime statistics of the MCP server.
+
+    Returns:
+        Hit/miss counters of the GitHub API response cache and of the
+        repository handle cache, the state of the request scheduler and the
+        usage and remaining rate limit of each token of the pool, how many
+        read calls were coalesced with an identical call in flight, the fetch
+        counters of the local mirrors, the reuse of local git repository
+        handles, the webhook deliveries received, the startup timings, the
+        peak memory and CPU time of the process and, per tool, the calls,
+        errors, latency and GitHub API requests and bytes.
+    """
+    return {
+        "result": {
+            "tools": tool_metrics.stats(),
+            "response_cache": get_response_cache().stats(),
+            "disk_cache": get_disk_cache().stats() if get_disk_cache() else None,
+            "repository_cache": get_repository_cache().stats(),
+            "scheduler": get_scheduler().stats(),
+            "tokens": get_token_pool().stats(),
+            "coalescing": single_flight.stats(),
+            "mirrors": get_mirror_store().stats() if get_mirror_store() else None,
+            "git_repositories": get_repo_pool().stats(),
+            "webhooks": dict(webhook_stats),
+            "startup": startup_stats,
+            "process": process_stats()
+        }
+    }
+
+# Respuestas en caché afectadas por cada evento, como rutas bajo /repos/{owner}/{repo};
+# "" es la información del propio repositorio
+WEBHOOK_INVALIDATIONS = {
+    "push": ["", "/commits", "/branches", "/git/ref", "/pulls"],
+    "create": ["/branches", "/git/ref"],
+    "delete": ["/branches", "/git/ref"],
+    "pull_request": ["/pulls"],
+}
+
+# Webhook event equivalent to each write the server makes, by path under /repos/{owner}/{repo}.
+# The first pattern that matches wins.
+WRITE_EVENTS = [
+    (re.compile(r'^/pulls/\d+/merge'), "push"),
+    (re.compile(r'^/pulls'), "pull_request"),
+    (re.compile(r'^/git/refs'), "create"),
+]
+
+def write_event(path):
+    """Webhook event equivalent to a write to path under /repos/{owner}/{repo}, or None"""
+    return next((event for pattern, event in WRITE_EVENTS if pattern.match(path)), None)
+
+# Deliveries received by the webhook listener, by event
+webhook_stats = Counter()
+
+def verify_webhook_signature(secret, body, signature):
+    """Check the X-Hub-Signature-256 header of a delivery"""
+    expected = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature or "")
+
+def apply_webhook(event, payload):
+    """
+    Drop the cached results a webhook event makes stale, so the next read
+    fetches them again even with a long GITHUB_CACHE_TTL.
+
+    Returns:
+        The repository the event refers to, or None if the event was ignored
+    """
+    repository_full_name = (payload.get("repository") or {}).get("full_name")
+    if not repository_full_name:
+        return None
+
+    if event == "repository":
+        # Creado, borrado, renombrado...: todo lo del repositorio y la lista de repositorios
+        invalidate_repository(repository_full_name)
+        old_name = payload.get("changes", {}).get("repository", {}).get("name", {}).get("from")
+        if old_name:
+            invalidate_repository(f"{repository_full_name.split('/')[0]}/{old_name}")
+        return repository_full_name
+
+    if event not in WEBHOOK_INVALIDATIONS:
+        return None
+    drop_cached_responses(repository_full_name, event)
+    return repository_full_name
+
+def drop_cached_responses(repository_full_name, event):
+    """Drop the cached responses of a repository made stale by a webhook event (see WEBHOOK_INVALIDATIONS)"""
+    api_url = get_github_config()['apiUrl']
+    for cache in (get_response_cache(), get_disk_cache()):
+        if cache is None:
+            continue
+        for path in WEBHOOK_INVALIDATIONS[event]:
+            if path:
+                cache.pop_prefix(f"{api_url}/repos/{repository_full_name}{path}")
+            else:
+                cache.pop(f"{api_url}/repos/{repository_full_name}")
+    if event != "pull_request" and get_mirror_store():
+        get_mirror_store().mark_stale(repository_full_name)
+
+def create_webhook_app(secret):
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    async def receive(request):
+        body = await request.body()
+        if not verify_webhook_signature(secret, body, request.headers.get("X-Hub-Signature-256")):
+            webhook_stats["rejected"] += 1
+            return JSONResponse({"message": "Invalid signature"}, status_code=401)
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return JSONResponse({"message": "Invalid JSON payload"}, status_code=400)
+        event = request.headers.get("X-GitHub-Event", "")
+        repository_full_name = apply_webhook(event, payload)
+        webhook_stats[event if repository_full_name else "ignored"] += 1
+        return JSONResponse({"event": event, "repository": repository_full_name})
+
+    return Starlette(routes=[Route("/webhook", receive, methods=["POST"])])
+
+def start_webhook_listener():
+    """
+    Serve POST /webhook in a background thread when GITHUB_WEBHOOK_PORT is set.
+    Deliveries must be signed with GITHUB_WEBHOOK_SECRET.
+    """
+    config = get_github_config()
+    if not config['webhookPort']:
+        return None
+    if not config['webhookSecret']:
+        print("GITHUB_WEBHOOK_SECRET is not set, webhook listener disabled", file=sys.stderr)
+        return None
+    import uvicorn
+    # Sin access log: uvicorn lo escribe en stdout, que es el canal del protocolo MCP
+    listener = uvicorn.Server(uvicorn.Config(
+        create_webhook_app(config['webhookSecret']),
+        host=config['webhookHost'],
+        port=config['webhookPort'],
+        log_level="warning",
+        access_log=False
+    ))
+    threading.Thread(target=listener.run, name="webhook-listener", daemon=True).start()
+    print(f"Webhook listener on http://{config['webhookHost']}:{config['webhookPort']}/webhook", file=sys.stderr)
+    return listener
+
+def render_metrics():
+    """Tool metrics, cache counters and rate limits in the Prometheus text format"""
+    lines = []
+
+    def label_text(labels):
+        escaped = []
+        for key, value in labels.items():
+            value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            escaped.append(f'{key}="{value}"')
+        return "{" + ",".join(escaped) + "}" if labels else ""
+
+    def metric(name, kind, description, samples):
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        for suffix, labels, value in samples:
+            lines.append(f"{name}{suffix}{label_text(labels)} {value}")
+
+    tools = tool_metrics.snapshot()
+    metric("mcp_tool_calls_total", "counter", "Tool calls",
+           [("", {"tool": name}, entry["calls"]) for name, entry in tools.items()])
+    metric("mcp_tool_errors_total", "counter", "Tool calls that returned an error",
+           [("", {"tool": name}, entry["errors"]) for name, entry in tools.items()])
+    histogram = []
+    for name, entry in tools.items():
+        for bound, count in zip((*LATENCY_BUCKETS, "+Inf"), itertools.accumulate(entry["buckets"])):
+            histogram.append(("_bucket", {"tool": name, "le": bound}, count))
+        histogram.append(("_sum", {"tool": name}, round(entry["seconds"], 6)))
+        histogram.append(("_count", {"tool": name}, entry["calls"]))
+    metric("mcp_tool_duration_seconds", "histogram", "Tool call latency", histogram)
+    metric("mcp_tool_upstream_requests_total", "counter", "GitHub API requests made by each tool",
+           [("", {"tool": name}, entry["upstream_requests"]) for name, entry in tools.items()])
+    metric("mcp_tool_upstream_bytes_total", "counter", "Bytes downloaded from the GitHub API by each tool",
+           [("", {"tool": name}, entry["upstream_bytes"]) for name, entry in tools.items()])
+
+    caches = {"response": get_response_cache().stats(), "repository": get_repository_cache().stats(),
+              "git_repositories": get_repo_pool().stats()}
+    metric("github_cache_hits_total", "counter", "Cache hits",
+           [("", {"cache": name}, stats["hits"]) for name, stats in caches.items()])
+    metric("github_cache_misses_total", "counter", "Cache misses",
+           [("", {"cache": name}, stats["misses"]) for name, stats in caches.items()])
+    metric("github_coalesced_calls_total", "counter", "Read calls that shared an identical call in flight",
+           [("", {}, single_flight.shared)])
+
+    scheduler = get_scheduler()
+    quotas = [(label, resource, quota) for label, resources in list(scheduler.quota.items())
+              for resource, quota in list(resources.items())]
+    metric("github_rate_limit_remaining", "gauge", "Requests left in the current rate limit window",
+           [("", {"token": label, "resource": resource}, quota["remaining"]) for label, resource, quota in quotas])
+    metric("github_rate_limit_limit", "gauge", "Requests allowed per rate limit window",
+           [("", {"token": label, "resource": resource}, quota["limit"]) for label, resource, quota in quotas])
+    metric("github_rate_limit_reset_timestamp_seconds", "gauge", "When the rate limit window resets",
+           [("", {"token": label, "resource": resource}, quota["reset"]) for label, resource, quota in quotas])
+    metric("github_requests_total", "counter", "GitHub API requests per token",
+           [("", {"token": label}, count) for label, count in list(scheduler.requests.items())])
+    return "\n".join(lines) + "\n"
+
+def create_metrics_app():
+    """Starlette app serving GET /metrics"""
+    from starlette.applications import Starlette
+    from starlette.responses import PlainTextResponse
+    from starlette.routing import Route
+
+    async def metrics(request):
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+    return Starlette(routes=[Route("/metrics", metrics, methods=["GET"])])
+
+def start_metrics_listener():
+    """Serve GET /metrics in a background thread when GITHUB_METRICS_PORT is set"""
+    config = get_github_config()
+    if not config['metricsPort']:
+        return None
+    import uvicorn
+    # Sin access log: uvicorn lo escribe en stdout, que es el canal del protocolo MCP
+    listener = uvicorn.Server(uvicorn.Config(
+        create_metrics_app(),
+        host=config['metricsHost'],
+        port=config['metricsPort'],
+        log_level="warning",
+        access_log=False
+    ))
+    threading.Thread(target=listener.run, name="metrics-listener", daemon=True).start()
+    print(f"Prometheus metrics on http://{config['metricsHost']}:{config['metricsPort']}/metrics", file=sys.stderr)
+    return listener
+
+def set_remote(repo, usuario, repo_name):
+    """
+    Point origin at the repository, touching the config only if the URL
+    changes. The URL never carries the token (see git_auth_env), which also
+    replaces the tokenized URLs written by earlier versions.
+    """
+    remote_url = f"{web_url()}/{usuario}/{repo_name}.git"
     if 'origin' in [remote.name for remote in repo.remotes]:
-        repo.remote('origin').set_url(remote_url)
+        origin = repo.remote('origin')
+        if origin.url == remote_url:
+            return
+        origin.set_url(remote_url)
     else:
         repo.create_remote('origin', remote_url)
-    # No imprimimos la URL completa para no exponer el token
-    print(f"Remote origin configurado para {usuario}/{repo_name}")
+    print(f"Remote origin configurado para {usuario}/{repo_name}", file=sys.stderr)
 
 @mcp.tool()
-def git_add(repo_path = "."):
+@run_in_thread
+def git_add(repo_path = ".", paths = None):
+    """
+    Stage changes in a local repository.
+
+    Args:
+        repo_path: Local path to the repository.
+        paths: List of pathspecs to stage (new, modified and deleted files).
+            If not provided, every change in the working tree is staged.
+    """
     try:
-        repo = Repo(repo_path)
-        repo.git.add(A=True)
+        with get_repo_pool().open(repo_path) as repo:
+            if paths:
+                repo.git.add('-A', '--', *paths)
+            else:
+                repo.git.add(A=True)
         return {"result": {"message": "Files added to staging area"}}
     except Exception as e:
         return {"error": str(e)}
 
 @mcp.tool()
+@run_in_thread
 def git_commit(message = "First Commit", repo_path = "."):
     try:
-        from datetime import datetime
-        repo = Repo(repo_path)
-        if repo.is_dirty(untracked_files=True):
-            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            commit_message = f"Changes in server ({current_time}): {message}"
-            repo.git.commit(m=commit_message)
-            return {"result": {"message": f"Committed: {commit_message}"}}
-        else:
-            return {"error": "No changes to commit"}
+        with get_repo_pool().open(repo_path) as repo:
+            # Solo importa el índice: git diff --cached --quiet sale con 1 si hay cambios
+            status, _, _ = repo.git.diff('--cached', '--quiet', with_extended_output=True, with_exceptions=False)
+            if status == 1:
+                current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                commit_message = f"Changes in server ({current_time}): {message}"
+                repo.git.commit(m=commit_message)
+                return {"result": {"message": f"Committed: {commit_message}"}}
+            else:
+                return {"error": "No changes to commit"}
+    except Exception as e:
+        return {"error": str(e)}
+
+@mcp.tool()
+@run_in_thread
+def git_status(repo_path = ".", paths = None):
+    """
+    Get the staged, unstaged and untracked changes of a local repository.
+
+    Args:
+        repo_path: Local path to the repository.
+        paths: List of pathspecs to limit the status to.
+
+    Returns:
+        The current branch and the changed paths, grouped by state.
+    """
+    try:
+        with get_repo_pool().open(repo_path) as repo:
+            args = ['--porcelain=v1', '-z', '--untracked-files=normal']
+            if paths:
+                args += ['--', *paths]
+            output = repo.git.status(*args, strip_newline_in_stdout=False)
+            branch = repo.git.branch('--show-current')
+
+        staged, unstaged, untracked = [], [], []
+        entries = iter(output.split('\0'))
+        for entry in entries:
+            if not entry:
+                continue
+            code, path = entry[:2], entry[3:]
+            if code == '??':
+                untracked.append(path)
+                continue
+            if code[0] in 'RC':
+                # En los renombrados la ruta original viene en la entrada siguiente
+                staged.append({"path": path, "status": code[0], "from": next(entries)})
+            elif code[0] != ' ':
+                staged.append({"path": path, "status": code[0]})
+            if code[1] != ' ':
+                unstaged.append({"path": path, "status": code[1]})
+        return {
+            "result": {
+                "branch": branch,
+                "clean": not (staged or unstaged or untracked),
+                "staged": staged,
+                "unstaged": unstaged,
+                "untracked": untracked
+            }
+        }
     except Exception as e:
         return {"error": str(e)}
 
 @mcp.tool()
+@run_in_thread
 def git_push(branch="master", repo_path=".", token=None, usuario=None, repo_name=None, repository_full_name=None):
     """
     Push changes to a remote repository.
@@ -410,7 +2775,6 @@ def git_push(branch="master", repo_path=".", token=None, usuario=None, repo_name
         repository_full_name: Full repository name in the format "username/repo". If provided, overrides usuario and repo_name.
     """
     try:
-        repo = Repo(repo_path)
         config = get_github_config()
         
         if not token and config:
@@ -431,10 +2795,12 @@ def git_push(branch="master", repo_path=".", token=None, usuario=None, repo_name
                 repo_name = config.get('repository')
         
         if token and repo_name and usuario:
-            # Usar la función existente para configurar el remote con el token
-            set_remote_with_token(repo_path, token, usuario, repo_name)
-            
-            repo.git.push('origin', branch)
+            if branch.startswith('-'):
+                return {"error": f"Invalid branch name: {branch}"}
+            with get_repo_pool().open(repo_path) as repo:
+                set_remote(repo, usuario, repo_name)
+                # El token va en una cabecera HTTP: no queda en .git/config, que en modo compartido lee el cliente
+                repo.git.push('origin', branch, env=git_auth_env(token))
             return {
                 "result": {
                     "message": "Push completado exitosamente",
@@ -451,15 +2817,42 @@ def git_push(branch="master", repo_path=".", token=None, usuario=None, repo_name
     except Exception as e:
         return {"error": str(e)}
 
+def enable_shared_mode(host, port):
+    """Serve many clients from this process over SSE; see session_repo_path"""
+    global shared_mode
+    shared_mode = True
+    mcp.settings.host = host
+    mcp.settings.port = port
+
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="MCP server for GitHub")
+    parser.add_argument("--transport", choices=["stdio", "sse"], default="stdio",
+                        help="stdio serves the client that started the process; sse serves any number of clients over HTTP")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on with --transport sse")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on with --transport sse")
+    parser.add_argument("--env-file", help="Environment file to load instead of the .env next to server.py")
+    args = parser.parse_args()
     try:
         # Load environment variables explicitly
-        env_path = load_environment()
+        env_path = load_environment(args.env_file)
         print(f"Loading environment from: {env_path}", file=sys.stderr)
-        
-        init_github_client()
-        print("Starting MCP server...", file=sys.stderr)
-        mcp.run(transport="stdio")
+
+        # GITHUB_VERIFY_TOKEN: background (default), sync or off
+        verify_mode = get_github_config()['verifyToken']
+        if verify_mode == 'sync':
+            init_github_client()
+        elif verify_mode == 'background':
+            start_token_check()
+        start_webhook_listener()
+        start_metrics_listener()
+
+        startup_stats["ready_ms"] = round((time.perf_counter() - STARTED_AT) * 1000, 1)
+        print(f"Starting MCP server (startup took {startup_stats['ready_ms']} ms)...", file=sys.stderr)
+        if args.transport == "sse":
+            enable_shared_mode(args.host, args.port)
+            print(f"Serving MCP over SSE on http://{args.host}:{args.port}/sse", file=sys.stderr)
+        mcp.run(transport=args.transport)
     except Exception as e:
         print(f"Fatal error: {str(e)}", file=sys.stderr)
         sys.exit(1)
@@ -19,6 +19,33 @@ def get_text_content(obj: Any) -> str:
         return obj.text
     return str(obj)
 
+def parse_result(result) -> dict:
+    """Parse the JSON payload of a call_tool result"""
+    result_dict = {}
+    for key, value in result:
+        result_dict[key] = value
+    if not result_dict.get("content"):
+        return {}
+    return json.loads(get_text_content(result_dict["content"][0]))
+
+async def page_commits(session: ClientSession, repository_full_name: str,
+                       page_size: int = 50, max_pages: int = 20) -> list:
+    """Walk the commit history page by page following next_cursor"""
+    commits = []
+    arguments = {"repository_full_name": repository_full_name, "limit": page_size}
+    for page in range(1, max_pages + 1):
+        content_data = parse_result(await session.call_tool("list_commits", arguments))
+        if "result" not in content_data:
+            print(f"Error en la página {page}: {content_data.get('error', 'respuesta vacía')}")
+            break
+        commits.extend(content_data["result"])
+        print(f"  Página {page}: {len(content_data['result'])} commits")
+        next_cursor = content_data.get("next_cursor")
+        if not next_cursor:
+            break
+        arguments = {"repository_full_name": repository_full_name, "limit": page_size, "cursor": next_cursor}
+    return commits
+
 async def main():
     server_params = StdioServerParameters(
         command = "python",
@@ -38,31 +65,14 @@ async def main():
                         print(f" - {tool.name}: {tool.description}")
                         if tool.name == "list_commits":
                             list_commits_found = True
-                            print("\nLlamando a list_commits para MCPGithub...")
-                            result = await session.call_tool("list_commits", {
-                                "repository_full_name": "alvnavraii/MCPGithub"
-                            })
-                            
-                            print("\nRespuesta de list_commits:")
-                            # Extract and parse the nested JSON response
-                            result_dict = {}
-                            for key, value in result:
-                                result_dict[key] = value
-                                
-                            if result_dict.get("content"):
-                                content = result_dict["content"][0]
-                                content_str = get_text_content(content)
-                                content_data = json.loads(content_str)
-                                
-                                if "result" in content_data:
-                                    commits = content_data["result"]
-                                    print(f"\nEncontrados {len(commits)} commits:\n")
-                                    for commit in commits:
-                                        print(format_commit(commit))
-                                else:
-                                    print("No se encontraron commits en la respuesta")
+                            print("\nPaginando list_commits para MCPGithub...")
+                            commits = await page_commits(session, "alvnavraii/MCPGithub")
+                            if commits:
+                                print(f"\nEncontrados {len(commits)} commits:\n")
+                                for commit in commits:
+                                    print(format_commit(commit))
                             else:
-                                print("Respuesta vacía del servidor")
+                                print("No se encontraron commits en la respuesta")
                     
             if not list_commits_found:
                 print("Tool 'list_commits' not found")